@@ -4,32 +4,89 @@ Handles generation and management of SSL/TLS certificates
 """
 
 import os
-from datetime import datetime, timedelta
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
 from cryptography import x509
 from cryptography.x509.oid import NameOID
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
 from cryptography.hazmat.backends import default_backend
 
 
+# Host certificate serial numbers are sliced from one urandom read
+SERIAL_BYTES = 20
+SERIAL_BATCH = 256
+_serial_entropy = {"pool": b"", "offset": 0}
+_serial_lock = threading.Lock()
+# A forked worker must not reissue serials left in its parent's pool
+os.register_at_fork(after_in_child=lambda: _serial_entropy.update(pool=b"", offset=0))
+
+
+def _random_serial_number() -> int:
+    """
+    Return a random positive serial number of at most 20 octets (RFC 5280)
+    
+    Equivalent to x509.random_serial_number(), but reads os.urandom once
+    every SERIAL_BATCH serials instead of once per certificate.
+    """
+    with _serial_lock:
+        pool, offset = _serial_entropy["pool"], _serial_entropy["offset"]
+        if offset >= len(pool):
+            pool = _serial_entropy["pool"] = os.urandom(SERIAL_BYTES * SERIAL_BATCH)
+            offset = 0
+        _serial_entropy["offset"] = offset + SERIAL_BYTES
+    # Dropping the top bit keeps the DER integer positive within 20 octets
+    return int.from_bytes(pool[offset:offset + SERIAL_BYTES], 'big') >> 1 or 1
+
+
 class CertificateAuthority:
     """Generates and manages SSL/TLS certificates for MITM interception"""
     
-    def __init__(self, cert_file: str, key_file: str):
+    # Validity period of generated host certificates
+    LEAF_VALIDITY = timedelta(days=30)
+    
+    # (second, not_before, not_after) shared by leaves minted in the same second
+    _leaf_validity: Tuple[int, datetime, datetime] = (0, datetime.min, datetime.min)
+    
+    def __init__(self, cert_file: str, key_file: str, cert_cache_dir: str = "certs",
+                 cert_cache_size: int = 1024):
         """
         Initialize Certificate Authority
         
         Args:
             cert_file: Path to CA certificate file
             key_file: Path to CA private key file
+            cert_cache_dir: Directory where generated host certificates are persisted
+            cert_cache_size: Maximum number of host certificates kept in memory
         """
         self.cert_file = cert_file
         self.key_file = key_file
+        self.cert_cache_dir = cert_cache_dir
+        os.makedirs(cert_cache_dir, exist_ok=True)
+        
+        # hostname -> (certificate, private_key), least recently used first
+        self._cert_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._cert_cache_size = max(1, cert_cache_size)
+        self._cache_lock = threading.Lock()
         
         if not os.path.exists(cert_file) or not os.path.exists(key_file):
             self.generate_ca_certificate()
         else:
             self.load_ca_certificate()
+        
+        # One key shared by every leaf certificate: keygen is the costly
+        # part of minting a certificate, signing a new one per host is cheap.
+        # P-256 also makes the handshake signature far cheaper than RSA-2048
+        self._leaf_key = ec.generate_private_key(ec.SECP256R1(), default_backend())
+        self._leaf_key_pem = self._leaf_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.TraditionalOpenSSL,
+            encryption_algorithm=serialization.NoEncryption()
+        )
     
     def generate_ca_certificate(self) -> None:
         """Generate self-signed CA certificate and private key"""
@@ -58,9 +115,9 @@ class CertificateAuthority:
         ).serial_number(
             x509.random_serial_number()
         ).not_valid_before(
-            datetime.utcnow()
+            datetime.now(timezone.utc)
         ).not_valid_after(
-            datetime.utcnow() + timedelta(days=365)
+            datetime.now(timezone.utc) + timedelta(days=365)
         ).add_extension(
             x509.BasicConstraints(ca=True, path_length=None),
             critical=True,
@@ -100,7 +157,11 @@ class CertificateAuthority:
     
     def generate_certificate(self, hostname: str) -> tuple:
         """
-        Generate a certificate for a specific hostname, signed by the CA
+        Get a certificate for a specific hostname, signed by the CA
+        
+        Certificates are generated once per hostname and then served from
+        memory, or from cert_cache_dir when another process (or a previous
+        run) already produced them.
         
         Args:
             hostname: The hostname to generate certificate for (e.g., 'example.com')
@@ -108,18 +169,154 @@ class CertificateAuthority:
         Returns:
             Tuple of (certificate, private_key)
         """
-        # Generate server private key
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048,
-            backend=default_backend()
+        with self._cache_lock:
+            cached = self._cached_certificate(hostname)
+            if cached is None:
+                cached = self._load_cached_certificate(hostname)
+                if cached is None:
+                    cached = self._create_certificate(hostname)
+                    self._save_cached_certificate(hostname, *cached)
+                self._remember_certificate(hostname, cached)
+        
+        return cached
+    
+    def get_certificate_files(self, hostname: str) -> Tuple[str, str]:
+        """
+        Get the on-disk PEM files for a hostname, generating them if needed
+        
+        Args:
+            hostname: The hostname the certificate is for
+            
+        Returns:
+            Tuple of (cert_path, key_path)
+        """
+        self.generate_certificate(hostname)
+        return self._certificate_paths(hostname)
+    
+    def get_certificate_pem(self, hostname: str) -> bytes:
+        """
+        Get a hostname's certificate and private key as one PEM chain
+        
+        Unlike get_certificate_files this never touches cert_cache_dir: a
+        certificate not already known is minted and kept in memory only.
+        
+        Args:
+            hostname: The hostname the certificate is for
+            
+        Returns:
+            Certificate PEM followed by its private key PEM
+        """
+        with self._cache_lock:
+            cached = self._cached_certificate(hostname)
+            if cached is None:
+                cached = self._create_certificate(hostname)
+                self._remember_certificate(hostname, cached)
+        
+        cert, key = cached
+        return cert.public_bytes(serialization.Encoding.PEM) + self._key_pem(key)
+    
+    def _cached_certificate(self, hostname: str) -> Optional[tuple]:
+        """Look up a hostname in the in-memory cache; caller holds _cache_lock"""
+        cached = self._cert_cache.get(hostname)
+        if cached is not None:
+            self._cert_cache.move_to_end(hostname)
+        return cached
+    
+    def _remember_certificate(self, hostname: str, cert_and_key: tuple) -> None:
+        """Add a certificate to the in-memory cache, evicting the least recently used"""
+        self._cert_cache[hostname] = cert_and_key
+        while len(self._cert_cache) > self._cert_cache_size:
+            self._cert_cache.popitem(last=False)
+    
+    @classmethod
+    def _leaf_validity_period(cls) -> Tuple[datetime, datetime]:
+        """Return (not_before, not_after) for a new leaf, reused within the same second"""
+        second = int(time.time())
+        cached = cls._leaf_validity
+        if cached[0] != second:
+            not_before = datetime.fromtimestamp(second, timezone.utc)
+            cached = cls._leaf_validity = (second, not_before, not_before + cls.LEAF_VALIDITY)
+        return cached[1], cached[2]
+    
+    def _key_pem(self, key) -> bytes:
+        """Serialize a private key to PEM, reusing the shared leaf key's encoding"""
+        if key is self._leaf_key:
+            return self._leaf_key_pem
+        return key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.TraditionalOpenSSL,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+    
+    def _certificate_paths(self, hostname: str) -> Tuple[str, str]:
+        """Return the (cert_path, key_path) pair for a hostname in the cache dir"""
+        return (
+            os.path.join(self.cert_cache_dir, f"{hostname}.crt"),
+            os.path.join(self.cert_cache_dir, f"{hostname}.key"),
         )
+    
+    def _load_cached_certificate(self, hostname: str) -> Optional[tuple]:
+        """
+        Load a previously persisted certificate for a hostname
+        
+        Args:
+            hostname: The hostname to look up
+            
+        Returns:
+            Tuple of (certificate, private_key), or None if absent, expired
+            or issued by a different CA
+        """
+        cert_path, key_path = self._certificate_paths(hostname)
+        try:
+            with open(cert_path, "rb") as f:
+                cert = x509.load_pem_x509_certificate(f.read(), default_backend())
+            with open(key_path, "rb") as f:
+                # Written by this CA, so skip the costly RSA consistency check
+                key = serialization.load_pem_private_key(
+                    f.read(), password=None, backend=default_backend(),
+                    unsafe_skip_rsa_key_validation=True
+                )
+        except (OSError, ValueError):
+            return None
+        
+        if cert.issuer != self.ca_cert.subject or cert.not_valid_after_utc <= datetime.now(timezone.utc):
+            return None
+        return cert, key
+    
+    def _save_cached_certificate(self, hostname: str, cert: x509.Certificate, key) -> None:
+        """
+        Persist a host certificate and key to the cache directory
+        
+        Files are written to a temporary name and renamed into place so
+        concurrent readers never see a partial PEM.
+        """
+        cert_path, key_path = self._certificate_paths(hostname)
+        for path, data in ((key_path, self._key_pem(key)), (cert_path, cert.public_bytes(serialization.Encoding.PEM))):
+            fd, tmp_path = tempfile.mkstemp(dir=self.cert_cache_dir)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+    
+    def _create_certificate(self, hostname: str) -> tuple:
+        """
+        Generate a new certificate for a hostname, signed by the CA
+        
+        Args:
+            hostname: The hostname to generate certificate for
+            
+        Returns:
+            Tuple of (certificate, private_key)
+        """
+        # Reuse the shared leaf key; only the certificate is per host
+        private_key = self._leaf_key
         
         # Create certificate subject
         subject = x509.Name([
             x509.NameAttribute(NameOID.COMMON_NAME, hostname),
         ])
         
+        not_before, not_after = self._leaf_validity_period()
+        
         # Build and sign certificate
         cert = x509.CertificateBuilder().subject_name(
             subject
@@ -128,11 +325,11 @@ class CertificateAuthority:
         ).public_key(
             private_key.public_key()
         ).serial_number(
-            x509.random_serial_number()
+            _random_serial_number()
         ).not_valid_before(
-            datetime.utcnow()
+            not_before
         ).not_valid_after(
-            datetime.utcnow() + timedelta(days=30)
+            not_after
         ).add_extension(
             x509.SubjectAlternativeName([
                 x509.DNSName(hostname),
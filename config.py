@@ -25,11 +25,23 @@ CERT_VALIDITY_DAYS = 30
 REDIS_HOST = "localhost"
 REDIS_PORT = 6379
 REDIS_DB = 0
+REDIS_UNIX_SOCKET = None  # e.g. "/var/run/redis/redis.sock" when Redis runs locally
 REDIS_REQUEST_EXPIRATION = 3600  # 1 hour
 
+# Proxy Process Configuration
+PROXY_WORKERS = 1  # Processes sharing the port via SO_REUSEPORT (fork + Linux/BSD only)
+PROXY_MAX_HANDLERS = 128  # Handler threads across all workers; each worker's Redis pool is sized from its share
+
 # Request Handling Configuration
 REQUEST_TIMEOUT_SECONDS = 30
-REQUEST_READ_BUFFER_SIZE = 4096
+UPSTREAM_CONNECT_TIMEOUT_SECONDS = 10  # Upstream reads are bounded by REQUEST_TIMEOUT_SECONDS
+REQUEST_READ_BUFFER_SIZE = 16384  # One full TLS record per recv()
+REQUEST_MAX_HEADER_SIZE = 65536
+REQUEST_MAX_BODY_SIZE = 16 * 1024 * 1024  # Larger bodies are refused with 413
+SOCKET_RECV_BUFFER_SIZE = 262144
+SOCKET_SEND_BUFFER_SIZE = 262144
+SOCKET_LISTEN_BACKLOG = 1024  # Absorbs connect bursts while handlers are busy
+RESPONSE_STREAM_CHUNK_SIZE = 65536
 
 # Logging Configuration
 LOG_LEVEL = "INFO"
@@ -43,4 +55,5 @@ ENABLE_REQUEST_BLOCKING = True
 # Security Configuration
 ALLOW_CLEAR_ALL = False  # Require confirmation to clear all requests
 SSL_PROTOCOL = "TLS_SERVER"
-SSL_CIPHER_SUITES = None  # Use default
\ No newline at end of file
+SSL_CIPHER_SUITES = "ECDHE+AESGCM:ECDHE+CHACHA20:!aNULL"  # AES-NI / SIMD friendly AEAD suites, in server preference order
+SSL_CONTEXT_CACHE_SIZE = 1024  # Per-host server contexts kept, least recently used evicted
\ No newline at end of file
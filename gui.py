@@ -4,8 +4,12 @@ GUI Application
 Web interface for inspecting and managing intercepted requests
 """
 
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, jsonify
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from waitress import serve
+from json_provider import OrjsonProvider
 import json
 
 
@@ -22,11 +26,27 @@ class ProxyGUI:
         """
         self.proxy_api_url = proxy_api_url
         self.port = port
+        
+        # Shared keep-alive pool for every pass-through call to the proxy API
+        self.session = requests.Session()
+        self.session.headers.update({'Connection': 'keep-alive'})
+        # Retry refused connects while the API is still starting; urllib3
+        # only retries read errors for idempotent methods, so POSTs stay single-shot
+        self.session.mount('http://', HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(total=2, backoff_factor=0.05)
+        ))
         self.app = Flask(__name__)
+        self.app.json = OrjsonProvider(self.app)
         self._setup_routes()
     
     def _setup_routes(self) -> None:
         """Setup Flask routes"""
+        # Route closures read these as locals instead of attributes on self
+        session = self.session
+        api_url = self.proxy_api_url
+        relay = self._relay
         
         @self.app.route('/')
         def index():
@@ -38,11 +58,11 @@ class ProxyGUI:
         def get_requests():
             """Get pending requests from proxy API"""
             try:
-                response = requests.get(
-                    f'{self.proxy_api_url}/api/requests',
+                response = session.get(
+                    f'{api_url}/api/requests',
                     timeout=5
                 )
-                return jsonify(response.json())
+                return relay(response)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
         
@@ -50,11 +70,11 @@ class ProxyGUI:
         def get_request_details(request_id):
             """Get full request details from proxy API"""
             try:
-                response = requests.get(
-                    f'{self.proxy_api_url}/api/requests/{request_id}',
+                response = session.get(
+                    f'{api_url}/api/requests/{request_id}',
                     timeout=5
                 )
-                return jsonify(response.json())
+                return relay(response)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
         
@@ -62,13 +82,25 @@ class ProxyGUI:
         def get_response(request_id):
             """Get response details from proxy API"""
             try:
-                response = requests.get(
-                    f'{self.proxy_api_url}/api/responses/{request_id}',
+                response = session.get(
+                    f'{api_url}/api/responses/{request_id}',
                     timeout=5
                 )
-                if response.status_code == 404:
-                     return jsonify({'error': 'Response not found'}), 404
-                return jsonify(response.json())
+                return relay(response)
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+        
+        @self.app.route('/api/batch', methods=['POST'])
+        def batch():
+            """Forward a batch of read-only calls to proxy API"""
+            try:
+                from flask import request as flask_request
+                response = session.post(
+                    f'{api_url}/api/batch',
+                    json=flask_request.get_json(silent=True),
+                    timeout=5
+                )
+                return relay(response)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
         
@@ -79,12 +111,12 @@ class ProxyGUI:
             try:
                 from flask import request as flask_request
                 data = flask_request.get_json(silent=True)
-                response = requests.post(
-                    f'{self.proxy_api_url}/api/requests/{request_id}/allow',
+                response = session.post(
+                    f'{api_url}/api/requests/{request_id}/allow',
                     json=data,
                     timeout=5
                 )
-                return jsonify(response.json())
+                return relay(response)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
 
@@ -94,12 +126,12 @@ class ProxyGUI:
             try:
                 from flask import request as flask_request
                 data = flask_request.get_json(silent=True)
-                response = requests.post(
-                    f'{self.proxy_api_url}/api/responses/{request_id}/allow',
+                response = session.post(
+                    f'{api_url}/api/responses/{request_id}/allow',
                     json=data,
                     timeout=5
                 )
-                return jsonify(response.json())
+                return relay(response)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
         
@@ -107,11 +139,11 @@ class ProxyGUI:
         def block_request(request_id):
             """Send block decision to proxy API"""
             try:
-                response = requests.post(
-                    f'{self.proxy_api_url}/api/requests/{request_id}/block',
+                response = session.post(
+                    f'{api_url}/api/requests/{request_id}/block',
                     timeout=5
                 )
-                return jsonify(response.json())
+                return relay(response)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
         
@@ -119,11 +151,11 @@ class ProxyGUI:
         def delete_request(request_id):
             """Send delete decision to proxy API"""
             try:
-                response = requests.delete(
-                    f'{self.proxy_api_url}/api/requests/{request_id}',
+                response = session.delete(
+                    f'{api_url}/api/requests/{request_id}',
                     timeout=5
                 )
-                return jsonify(response.json())
+                return relay(response)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
         
@@ -132,11 +164,11 @@ class ProxyGUI:
         def health():
             """Check if proxy API is reachable"""
             try:
-                response = requests.get(
-                    f'{self.proxy_api_url}/api/health',
+                response = session.get(
+                    f'{api_url}/api/health',
                     timeout=5
                 )
-                return jsonify(response.json())
+                return relay(response)
             except Exception as e:
                 return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
         
@@ -144,11 +176,11 @@ class ProxyGUI:
         def stats():
             """Get proxy statistics"""
             try:
-                response = requests.get(
-                    f'{self.proxy_api_url}/api/stats',
+                response = session.get(
+                    f'{api_url}/api/stats',
                     timeout=5
                 )
-                return jsonify(response.json())
+                return relay(response)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
     
@@ -163,14 +195,11 @@ class ProxyGUI:
             try:
                 from flask import request as flask_request
                 if flask_request.method == 'GET':
-                    resp = requests.get(f'{self.proxy_api_url}/api/config/mode', timeout=5)
+                    resp = session.get(f'{api_url}/api/config/mode', timeout=5)
                 else:
-                    resp = requests.post(f'{self.proxy_api_url}/api/config/mode', json=flask_request.get_json(silent=True), timeout=5)
+                    resp = session.post(f'{api_url}/api/config/mode', json=flask_request.get_json(silent=True), timeout=5)
                     
-                if resp.status_code == 200:
-                    return jsonify(resp.json()), 200
-                else:
-                    return jsonify(resp.json()), resp.status_code
+                return relay(resp)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
 
@@ -180,14 +209,11 @@ class ProxyGUI:
             try:
                 from flask import request as flask_request
                 if flask_request.method == 'GET':
-                    resp = requests.get(f'{self.proxy_api_url}/api/config/domains', timeout=5)
+                    resp = session.get(f'{api_url}/api/config/domains', timeout=5)
                 else:
-                    resp = requests.post(f'{self.proxy_api_url}/api/config/domains', json=flask_request.get_json(silent=True), timeout=5)
+                    resp = session.post(f'{api_url}/api/config/domains', json=flask_request.get_json(silent=True), timeout=5)
                 
-                if resp.status_code == 200:
-                    return jsonify(resp.json()), 200
-                else:
-                    return jsonify(resp.json()), resp.status_code
+                return relay(resp)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
 
@@ -195,11 +221,8 @@ class ProxyGUI:
         def config_domains_delete(domain):
             """Proxy config domains delete"""
             try:
-                resp = requests.delete(f'{self.proxy_api_url}/api/config/domains/{domain}', timeout=5)
-                if resp.status_code == 200:
-                    return jsonify(resp.json()), 200
-                else:
-                    return jsonify(resp.json()), resp.status_code
+                resp = session.delete(f'{api_url}/api/config/domains/{domain}', timeout=5)
+                return relay(resp)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
 
@@ -209,14 +232,11 @@ class ProxyGUI:
             try:
                 from flask import request as flask_request
                 if flask_request.method == 'GET':
-                    resp = requests.get(f'{self.proxy_api_url}/api/config/keywords', timeout=5)
+                    resp = session.get(f'{api_url}/api/config/keywords', timeout=5)
                 else:
-                    resp = requests.post(f'{self.proxy_api_url}/api/config/keywords', json=flask_request.get_json(silent=True), timeout=5)
+                    resp = session.post(f'{api_url}/api/config/keywords', json=flask_request.get_json(silent=True), timeout=5)
                 
-                if resp.status_code == 200:
-                    return jsonify(resp.json()), 200
-                else:
-                    return jsonify(resp.json()), resp.status_code
+                return relay(resp)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
 
@@ -224,24 +244,45 @@ class ProxyGUI:
         def config_keywords_delete(keyword):
             """Proxy config keywords delete"""
             try:
-                resp = requests.delete(f'{self.proxy_api_url}/api/config/keywords/{keyword}', timeout=5)
-                if resp.status_code == 200:
-                    return jsonify(resp.json()), 200
-                else:
-                    return jsonify(resp.json()), resp.status_code
+                resp = session.delete(f'{api_url}/api/config/keywords/{keyword}', timeout=5)
+                return relay(resp)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
 
-    def run(self, debug: bool = True) -> None:
+    @staticmethod
+    def _relay(response: requests.Response) -> Response:
+        """
+        Relay a proxy API response to the browser without re-encoding it
+        
+        Args:
+            response: Response received from the proxy API
+            
+        Returns:
+            Flask response carrying the upstream body, status and content type
+        """
+        return Response(
+            response.content,
+            status=response.status_code,
+            content_type=response.headers.get('Content-Type', 'application/json')
+        )
+    
+    def run(self, debug: bool = False) -> None:
         """
-        Run GUI server
+        Run GUI server (waitress, or the werkzeug debugger when debugging)
         
         Args:
             debug: Enable debug mode
         """
         print(f"[+] GUI listening on http://127.0.0.1:{self.port}")
         print(f"[*] Proxy API: {self.proxy_api_url}")
-        self.app.run(host='127.0.0.1', port=self.port, debug=debug)
+        if debug:
+            # The werkzeug dev server is kept for its debugger only; the
+            # reloader would re-exec the process and start a second copy
+            self.app.run(host='127.0.0.1', port=self.port, debug=True,
+                         use_reloader=False, threaded=True)
+            return
+        serve(self.app, host='127.0.0.1', port=self.port, threads=8,
+              connection_limit=512, channel_timeout=30)
 
 
 def main():
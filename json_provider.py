@@ -0,0 +1,24 @@
+"""
+JSON Provider Module
+orjson-backed Flask JSON provider shared by the API and the GUI
+"""
+
+import orjson
+from flask.json.provider import JSONProvider
+from typing import Any
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider that serializes jsonify() payloads with orjson"""
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        # Hand the encoded bytes straight to the response, skipping the
+        # str round-trip dumps() needs to satisfy the provider interface
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
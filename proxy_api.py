@@ -3,9 +3,36 @@ Proxy API Module
 Flask API for GUI communication with the MITM proxy
 """
 
+import base64
+import logging
+import threading
+import time
 from flask import Flask, jsonify, request as flask_request
+from werkzeug.exceptions import HTTPException
+from waitress import serve
 from redis_storage import RedisStorage
-from typing import Tuple, Dict, Any
+from json_provider import OrjsonProvider
+from typing import Tuple, Dict, Any, Callable
+
+
+logger = logging.getLogger(__name__)
+
+# Most calls accepted in one /api/batch request
+MAX_BATCH_CALLS = 50
+
+
+def _encode_body(body: bytes) -> Tuple[str, str]:
+    """
+    Make a raw stored body JSON-safe
+    
+    Returns:
+        Tuple of (body text, body_encoding): 'utf-8' when the body decodes
+        as such, otherwise 'base64'
+    """
+    try:
+        return body.decode('utf-8'), 'utf-8'
+    except UnicodeDecodeError:
+        return base64.b64encode(body).decode('ascii'), 'base64'
 
 
 class ProxyAPI:
@@ -21,43 +48,37 @@ class ProxyAPI:
         """
         self.storage = storage
         self.port = port
+        
+        # Short-lived snapshots of the polled admin endpoints
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._cache_ttl = {'health': 0.5, 'stats': 0.25}
+        self._cache_locks = {key: threading.Lock() for key in self._cache_ttl}
+        
         self.app = Flask(__name__)
+        self.app.json = OrjsonProvider(self.app)
         self._setup_routes()
     
     def _setup_routes(self) -> None:
         """Setup all Flask routes"""
+        # Route closures read these as locals instead of attributes on self
+        storage = self.storage
         
         # Request endpoints
         @self.app.route('/api/requests', methods=['GET'])
         def get_pending_requests() -> Tuple[Dict[str, Any], int]:
             """Get all pending requests"""
-            pending_ids = self.storage.get_pending_requests()
-            requests_list = []
-            
-            for req_id in pending_ids:
-                req = self.storage.get_request(req_id)
-                requests_list.append({
-                    'id': req['id'],
-                    'hostname': req['hostname'],
-                    'method': req['method'],
-                    'path': req['path'],
-                    'timestamp': req['timestamp']
-                })
-            
-            return jsonify(requests_list), 200
+            return jsonify(storage.get_pending_summaries()), 200
         
         @self.app.route('/api/requests/<request_id>', methods=['GET'])
         def get_request_details(request_id: str) -> Tuple[Dict[str, Any], int]:
             """Get full request details"""
-            req = self.storage.get_request(request_id)
+            req = storage.get_request(request_id)
             
             if not req:
                 return jsonify({'error': 'Request not found'}), 404
             
-            try:
-                body_str = req['body']
-            except Exception:
-                body_str = "[Binary data - unable to decode]"
+            # Bodies are stored raw; only non-UTF-8 ones need base64 for JSON
+            body_str, body_encoding = _encode_body(req['body'])
             
             return jsonify({
                 'id': req['id'],
@@ -66,38 +87,44 @@ class ProxyAPI:
                 'path': req['path'],
                 'headers': req['headers'],
                 'body': body_str,
+                'body_encoding': body_encoding,
                 'timestamp': req['timestamp'],
             }), 200
         
         @self.app.route('/api/responses/<request_id>', methods=['GET'])
         def get_request_response(request_id: str) -> Tuple[Dict[str, Any], int]:
             """Get request response details"""
-            resp = self.storage.get_response(request_id)
+            resp = storage.get_response(request_id)
             
             if not resp:
                 return jsonify({'error': 'Response not found'}), 404
             
+            body_str, body_encoding = _encode_body(resp['body'])
             return jsonify({
                 'id': request_id,
                 'status_code': resp['status_code'],
                 'headers': resp['headers'],
-                'body': resp['body']
+                'body': body_str,
+                'body_encoding': body_encoding
             }), 200        
         @self.app.route('/api/requests/<request_id>/allow', methods=['POST'])
         def allow_request(request_id: str) -> Tuple[Dict[str, Any], int]:
             """Mark request as allowed (to be forwarded), optionally updating data"""
             try:
                 # Check for modifications
-                data = flask_request.get_json(silent=True)
-                if data:
-                    headers = data.get('headers')
-                    body = data.get('body')
-                    if headers or body is not None:
-                        self.storage.update_request_data(request_id, headers, body)
+                data = flask_request.get_json(silent=True) or {}
+                headers = data.get('headers')
+                body = data.get('body')
+                if body is not None and data.get('body_encoding') == 'base64':
+                    body = base64.b64decode(body, validate=True)
                 
-                success = self.storage.update_request_status(request_id, 'allowed')
+                if headers or body is not None:
+                    # Edits and the decision go out in one round-trip
+                    success = storage.update_request_data(request_id, headers, body, status='allowed')
+                else:
+                    success = storage.update_request_status(request_id, 'allowed')
                 if success:
-                    print(f"[+] Request {request_id} is ALLOWED")
+                    logger.info("Request %s is ALLOWED", request_id)
                     return jsonify({'status': 'allowed'}), 200
                 else:
                     return jsonify({'error': 'Failed to update status'}), 500
@@ -109,19 +136,22 @@ class ProxyAPI:
             """Mark response as allowed (to be returned to client), optionally updating data"""
             try:
                 # Check for modifications
-                data = flask_request.get_json(silent=True)
-                if data:
-                    headers = data.get('headers')
-                    body = data.get('body')
-                    # Ensure headers is a dict if provided (JSON string from frontend?)
-                    # Frontend usually sends object, but let's be safe if we need to parse
-                    # Here we assume it receives a dict structure
-                    if headers or body is not None:
-                        self.storage.update_response_data(request_id, headers, body)
+                data = flask_request.get_json(silent=True) or {}
+                headers = data.get('headers')
+                body = data.get('body')
+                # Ensure headers is a dict if provided (JSON string from frontend?)
+                # Frontend usually sends object, but let's be safe if we need to parse
+                # Here we assume it receives a dict structure
+                if body is not None and data.get('body_encoding') == 'base64':
+                    body = base64.b64decode(body, validate=True)
 
-                success = self.storage.update_response_status(request_id, 'allowed')
+                if headers or body is not None:
+                    # Edits and the decision go out in one round-trip
+                    success = storage.update_response_data(request_id, headers, body, status='allowed')
+                else:
+                    success = storage.update_response_status(request_id, 'allowed')
                 if success:
-                    print(f"[+] Response {request_id} is ALLOWED")
+                    logger.info("Response %s is ALLOWED", request_id)
                     return jsonify({'status': 'allowed'}), 200
                 else:
                     return jsonify({'error': 'Failed to update status'}), 500
@@ -131,7 +161,7 @@ class ProxyAPI:
         @self.app.route('/api/requests/<request_id>/delete', methods=['DELETE'])
         def delete_request(request_id: str) -> Tuple[Dict[str, Any], int]:
             """Delete a request"""
-            success = self.storage.delete_request(request_id)
+            success = storage.delete_request(request_id)
             if success:
                 return jsonify({'status': 'deleted'}), 200
             else:
@@ -140,9 +170,9 @@ class ProxyAPI:
         @self.app.route('/api/requests/<request_id>/block', methods=['POST'])
         def block_request(request_id: str) -> Tuple[Dict[str, Any], int]:
             """Mark request as blocked (will not be forwarded)"""
-            success = self.storage.delete_request(request_id)
+            success = storage.delete_request(request_id)
             if success:
-                print(f"[+] Request {request_id} is BLOCKED")
+                logger.info("Request %s is BLOCKED", request_id)
                 return jsonify({'status': 'blocked'}), 200
             else:
                 return jsonify({'error': 'Failed to update status'}), 500
@@ -154,7 +184,7 @@ class ProxyAPI:
         @self.app.route('/api/config/mode', methods=['GET'])
         def get_proxy_mode() -> Tuple[Dict[str, Any], int]:
             """Get current proxy mode"""
-            mode = self.storage.get_proxy_mode()
+            mode = storage.get_proxy_mode()
             return jsonify({'mode': mode}), 200
             
         @self.app.route('/api/config/mode', methods=['POST'])
@@ -165,7 +195,7 @@ class ProxyAPI:
                 return jsonify({'error': 'Mode required'}), 400
             
             mode = data['mode']
-            if self.storage.set_proxy_mode(mode):
+            if storage.set_proxy_mode(mode):
                 return jsonify({'status': 'success', 'mode': mode}), 200
             else:
                 return jsonify({'error': 'Invalid mode'}), 400
@@ -173,7 +203,7 @@ class ProxyAPI:
         @self.app.route('/api/config/domains', methods=['GET'])
         def get_blocked_domains() -> Tuple[Dict[str, Any], int]:
             """Get blocked domains"""
-            domains = self.storage.get_blocked_domains()
+            domains = storage.get_blocked_domains()
             return jsonify({'domains': domains}), 200
             
         @self.app.route('/api/config/domains', methods=['POST'])
@@ -184,7 +214,7 @@ class ProxyAPI:
                 return jsonify({'error': 'Domain required'}), 400
                 
             domain = data['domain']
-            if self.storage.add_blocked_domain(domain):
+            if storage.add_blocked_domain(domain):
                 return jsonify({'status': 'success', 'domain': domain}), 200
             else:
                 return jsonify({'error': 'Failed to add domain'}), 500
@@ -195,7 +225,7 @@ class ProxyAPI:
         @self.app.route('/api/config/domains/<path:domain>', methods=['DELETE'])
         def remove_blocked_domain(domain: str) -> Tuple[Dict[str, Any], int]:
             """Remove blocked domain"""
-            if self.storage.remove_blocked_domain(domain):
+            if storage.remove_blocked_domain(domain):
                 return jsonify({'status': 'success', 'domain': domain}), 200
             else:
                 return jsonify({'error': 'Failed to remove domain'}), 500
@@ -203,7 +233,7 @@ class ProxyAPI:
         @self.app.route('/api/config/keywords', methods=['GET'])
         def get_blocked_keywords() -> Tuple[Dict[str, Any], int]:
             """Get blocked keywords"""
-            keywords = self.storage.get_blocked_keywords()
+            keywords = storage.get_blocked_keywords()
             return jsonify({'keywords': keywords}), 200
             
         @self.app.route('/api/config/keywords', methods=['POST'])
@@ -214,7 +244,7 @@ class ProxyAPI:
                 return jsonify({'error': 'Keyword required'}), 400
                 
             keyword = data['keyword']
-            if self.storage.add_blocked_keyword(keyword):
+            if storage.add_blocked_keyword(keyword):
                 return jsonify({'status': 'success', 'keyword': keyword}), 200
             else:
                 return jsonify({'error': 'Failed to add keyword'}), 500
@@ -222,7 +252,7 @@ class ProxyAPI:
         @self.app.route('/api/config/keywords/<path:keyword>', methods=['DELETE'])
         def remove_blocked_keyword(keyword: str) -> Tuple[Dict[str, Any], int]:
             """Remove blocked keyword"""
-            if self.storage.remove_blocked_keyword(keyword):
+            if storage.remove_blocked_keyword(keyword):
                 return jsonify({'status': 'success', 'keyword': keyword}), 200
             else:
                 return jsonify({'error': 'Failed to remove keyword'}), 500
@@ -235,8 +265,8 @@ class ProxyAPI:
         #         data = flask_request.get_json()
         #         modified_body = data.get('body', '')
                 
-        #         self.storage.set_modified_body(request_id, modified_body)
-        #         self.storage.update_request_status(request_id, 'modified')
+        #         storage.set_modified_body(request_id, modified_body)
+        #         storage.update_request_status(request_id, 'modified')
                 
         #         print(f"[+] Request {request_id} marked as MODIFIED")
         #         return jsonify({'status': 'modified'}), 200
@@ -244,11 +274,48 @@ class ProxyAPI:
         #         return jsonify({'error': str(e)}), 400
         
         
+        @self.app.route('/api/batch', methods=['POST'])
+        def batch() -> Tuple[Dict[str, Any], int]:
+            """Run several read-only API calls in one round-trip"""
+            calls = flask_request.get_json(silent=True)
+            if not isinstance(calls, list):
+                return jsonify({'error': 'List of calls required'}), 400
+            if len(calls) > MAX_BATCH_CALLS:
+                return jsonify({'error': f'At most {MAX_BATCH_CALLS} calls per batch'}), 400
+            
+            results = []
+            for call in calls:
+                if not isinstance(call, dict):
+                    results.append({'status': 400, 'body': {'error': 'Call must be an object'}})
+                    continue
+                if str(call.get('method', 'GET')).upper() != 'GET':
+                    results.append({'status': 405, 'body': {'error': 'Only GET calls can be batched'}})
+                    continue
+                path, _, query = str(call.get('path', '')).partition('?')
+                
+                # Dispatch in-process to the same view the standalone call
+                # would hit, under its own request context so request.args
+                # is the call's query string; a failing call only fails its
+                # own entry
+                with self.app.test_request_context(path, method='GET', query_string=query):
+                    try:
+                        response = self.app.make_response(self.app.dispatch_request())
+                    except HTTPException as e:
+                        results.append({'status': e.code, 'body': {'error': e.name}})
+                        continue
+                    except Exception as e:
+                        logger.exception("Batch call GET %s failed", path)
+                        results.append({'status': 500, 'body': {'error': str(e)}})
+                        continue
+                results.append({'status': response.status_code, 'body': response.get_json()})
+            
+            return jsonify(results), 200
+        
         # Admin endpoints
         @self.app.route('/api/health', methods=['GET'])
         def health() -> Tuple[Dict[str, Any], int]:
             """Health check endpoint"""
-            health_status = self.storage.get_health_status()
+            health_status = self._cached('health', storage.get_health_status)
             if health_status['status'] == 'connected':
                 return jsonify(health_status), 200
             else:
@@ -257,18 +324,53 @@ class ProxyAPI:
         @self.app.route('/api/stats', methods=['GET'])
         def get_stats() -> Tuple[Dict[str, Any], int]:
             """Get proxy statistics"""
-            pending_ids = self.storage.get_pending_requests()
-            return jsonify({
-                'total_pending': len(pending_ids),
-                'redis_health': self.storage.get_health_status()
-            }), 200
+            return jsonify(self._cached('stats', self._compute_stats)), 200
+        
+    def _compute_stats(self) -> Dict[str, Any]:
+        """Build the /api/stats payload"""
+        return {
+            'total_pending': self.storage.count_pending_requests(),
+            'redis_health': self._cached('health', self.storage.get_health_status)
+        }
+    
+    def _cached(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return a cached value for key, recomputing it once its TTL expires
         
+        Args:
+            key: Cache key (one of self._cache_ttl)
+            compute: Callable producing a fresh value
+            
+        Returns:
+            Cached or freshly computed value
+        """
+        ttl = self._cache_ttl[key]
+        entry = self._cache.get(key)
+        if entry and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+        
+        # Only one thread regenerates; the others wait and reuse its result
+        with self._cache_locks[key]:
+            entry = self._cache.get(key)
+            if entry and time.monotonic() - entry[0] < ttl:
+                return entry[1]
+            value = compute()
+            self._cache[key] = (time.monotonic(), value)
+            return value
+    
     def run(self, debug: bool = False) -> None:
         """
-        Run Flask API server
+        Run Flask API server (waitress, or the werkzeug debugger when debugging)
         
         Args:
             debug: Enable debug mode
         """
         print(f"[+] API listening on http://127.0.0.1:{self.port}")
-        self.app.run(host='127.0.0.1', port=self.port, debug=debug) 
\ No newline at end of file
+        if debug:
+            # The werkzeug dev server is kept for its debugger only; the
+            # reloader would re-exec the process and start a second copy
+            self.app.run(host='127.0.0.1', port=self.port, debug=True,
+                         use_reloader=False, threaded=True)
+            return
+        serve(self.app, host='127.0.0.1', port=self.port, threads=8,
+              connection_limit=512, channel_timeout=30) 
\ No newline at end of file
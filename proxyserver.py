@@ -5,22 +5,195 @@ Main entry point for the MITM proxy with Redis backend
 """
 
 import socket
+import selectors
 import ssl
 import threading
 import os
-import uuid
+import glob
+import shutil
 import time
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.backends import default_backend
+from typing import Dict, Optional
+import ahocorasick
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from http.cookiejar import DefaultCookiePolicy
 
+from config import (
+    REQUEST_READ_BUFFER_SIZE,
+    REQUEST_MAX_HEADER_SIZE,
+    REQUEST_MAX_BODY_SIZE,
+    REQUEST_TIMEOUT_SECONDS,
+    UPSTREAM_CONNECT_TIMEOUT_SECONDS,
+    SOCKET_RECV_BUFFER_SIZE,
+    SOCKET_SEND_BUFFER_SIZE,
+    SOCKET_LISTEN_BACKLOG,
+    RESPONSE_STREAM_CHUNK_SIZE,
+    SSL_CIPHER_SUITES,
+    SSL_CONTEXT_CACHE_SIZE,
+    REDIS_UNIX_SOCKET,
+    PROXY_WORKERS,
+    PROXY_MAX_HANDLERS,
+    LOG_LEVEL,
+    LOG_FORMAT,
+)
 from certificate_authority import CertificateAuthority
 from redis_storage import RedisStorage
 from request_interceptor import RequestInterceptor
 from proxy_api import ProxyAPI
 
 
+logger = logging.getLogger(__name__)
+
+# Static proxy responses, encoded once at import time
+BAD_REQUEST_RESPONSE = b"HTTP/1.1 400 Bad Request\r\n\r\n"
+CONNECTION_ESTABLISHED_RESPONSE = b"HTTP/1.1 200 Connection Established\r\n\r\n"
+BAD_GATEWAY_RESPONSE = b"HTTP/1.1 502 Bad Gateway\r\n\r\nProxy Error"
+BLOCKED_RESPONSE = b"HTTP/1.1 403 Forbidden\r\n\r\nBlocked by proxy"
+RESPONSE_DECISION_TIMEOUT_RESPONSE = b"HTTP/1.1 504 Gateway Timeout\r\n\r\nResponse decision timeout"
+UPSTREAM_TIMEOUT_RESPONSE = b"HTTP/1.1 504 Gateway Timeout\r\n\r\nUpstream timeout"
+NOT_IMPLEMENTED_RESPONSE = b"HTTP/1.1 501 Not Implemented\r\n\r\nModified requests not yet implemented"
+REQUEST_TIMEOUT_RESPONSE = b"HTTP/1.1 408 Request Timeout\r\n\r\n"
+SERVICE_UNAVAILABLE_RESPONSE = b"HTTP/1.1 503 Service Unavailable\r\nConnection: close\r\nRetry-After: 1\r\n\r\n"
+PAYLOAD_TOO_LARGE_RESPONSE = b"HTTP/1.1 413 Payload Too Large\r\nConnection: close\r\n\r\n"
+HEADERS_TOO_LARGE_RESPONSE = b"HTTP/1.1 431 Request Header Fields Too Large\r\nConnection: close\r\n\r\n"
+
+# Upstream headers dropped on forward (requests already decoded the body)
+SKIPPED_RESPONSE_HEADERS = frozenset(('transfer-encoding', 'content-encoding', 'content-length'))
+# Streamed bodies keep their content encoding; framing is rewritten
+STREAMED_SKIPPED_RESPONSE_HEADERS = frozenset(('transfer-encoding', 'content-length', 'connection'))
+
+# (connect, read) timeout for upstream requests, so a stalled server
+# cannot hold a handler slot indefinitely
+UPSTREAM_TIMEOUT = (UPSTREAM_CONNECT_TIMEOUT_SECONDS, REQUEST_TIMEOUT_SECONDS)
+
+# Filter-mode 403 pages, formatted with the blocked domain or keyword
+BLOCKED_DOMAIN_PAGE = b"<html><body><h1>Access Denied</h1><p>The domain <b>%s</b> is blocked by the proxy.</p></body></html>"
+BLOCKED_KEYWORD_PAGE = b"<html><body><h1>Access Denied</h1><p>The response contained a blocked keyword: <b>%s</b></p></body></html>"
+
+# Redis connections each process keeps beyond one per handler thread
+# (API threads)
+REDIS_POOL_HEADROOM = 16
+
+# Per-thread pool of random bytes for request IDs
+REQUEST_ID_BATCH = 1024
+_id_entropy = threading.local()
+# A forked worker must not replay the random bytes left in its parent's pool
+os.register_at_fork(after_in_child=lambda: _id_entropy.__dict__.clear())
+
+# (epoch second, ISO string without the fraction) of the last request timestamp
+_timestamp_cache = (0, "")
+
+
+def _new_request_id() -> str:
+    """
+    Generate a time-ordered (UUIDv7 layout) request ID
+    
+    The top 48 bits hold the Unix time in milliseconds, so IDs sort by
+    arrival; the remaining bits are random apart from version and variant.
+    Random bytes come from a per-thread pool refilled with one urandom()
+    call every REQUEST_ID_BATCH IDs.
+    """
+    pool = getattr(_id_entropy, 'pool', None)
+    offset = getattr(_id_entropy, 'offset', 0)
+    if pool is None or offset >= len(pool):
+        pool = _id_entropy.pool = os.urandom(10 * REQUEST_ID_BATCH)
+        offset = 0
+    _id_entropy.offset = offset + 10
+    
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(pool[offset:offset + 10], 'big')
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # Version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    hex_value = f"{value:032x}"
+    return f"{hex_value[:8]}-{hex_value[8:12]}-{hex_value[12:16]}-{hex_value[16:20]}-{hex_value[20:]}"
+
+
+def _request_timestamp() -> str:
+    """
+    Get the local ISO-8601 timestamp for a new request, with microseconds
+    
+    Matches datetime.now().isoformat(); only the YYYY-MM-DDTHH:MM:SS
+    prefix is formatted once per second and shared between requests.
+    """
+    global _timestamp_cache
+    second, nanoseconds = divmod(time.time_ns(), 1_000_000_000)
+    cached_second, cached_prefix = _timestamp_cache
+    if cached_second != second:
+        cached_prefix = datetime.fromtimestamp(second).isoformat()
+        _timestamp_cache = (second, cached_prefix)
+    return f"{cached_prefix}.{nanoseconds // 1000:06d}"
+
+
+def _start_log_listener() -> Optional[QueueListener]:
+    """
+    Move the root logger's handlers behind a queue drained by a listener thread
+    
+    Handler threads then only enqueue records; formatting and the stream
+    write happen on the listener. Called per process after forking, since
+    a listener thread does not survive fork().
+    
+    Returns:
+        The started listener, None if no handlers are configured
+    """
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, QueueHandler)]
+    if not handlers:
+        return None
+    log_queue = queue.SimpleQueue()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def _stop_log_listener(listener: QueueListener) -> None:
+    """Drain the listener and hand its handlers back to the root logger"""
+    listener.stop()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    for handler in listener.handlers:
+        root.addHandler(handler)
+
+
+class _UpstreamAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled upstream sockets get the proxy's TCP tuning"""
+    
+    # urllib3 already disables Nagle; keep that and add keepalive plus the
+    # same kernel buffer sizes the client-facing sockets use
+    SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        (socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_SEND_BUFFER_SIZE),
+        (socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_RECV_BUFFER_SIZE),
+    ]
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault('socket_options', self.SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+
+@lru_cache(maxsize=256)
+def _forbidden_response(page: bytes, subject: str) -> bytes:
+    """
+    Render a complete filter-mode 403 response
+    
+    Blocklists are small, so each domain or keyword is rendered once and
+    later blocks only cost a cache lookup.
+    """
+    body = page % subject.encode('utf-8')
+    return b"HTTP/1.1 403 Forbidden\r\nContent-Type: text/html\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+
+
 class MITMProxyServer:
     """Main MITM Proxy Server"""
     
@@ -33,7 +206,10 @@ class MITMProxyServer:
         key_file: str = "ca_key.pem",
         cert_cache_dir: str = "certs",
         redis_host: str = "localhost",
-        redis_port: int = 6379
+        redis_port: int = 6379,
+        redis_unix_socket: Optional[str] = None,
+        workers: int = 1,
+        max_handlers: int = 128
     ):
         """
         Initialize MITM Proxy Server
@@ -47,15 +223,60 @@ class MITMProxyServer:
             cert_cache_dir: Directory to cache generated certificates
             redis_host: Redis host
             redis_port: Redis port
+            redis_unix_socket: Redis UNIX socket path, used instead of host/port
+            workers: Number of proxy processes sharing the port (SO_REUSEPORT)
+            max_handlers: Maximum concurrently handled connections per worker
         """
         self.proxy_host = proxy_host
         self.proxy_port = proxy_port
         self.api_port = api_port
         self.cert_cache_dir = cert_cache_dir
         
+        # Multiple workers need fork() and SO_REUSEPORT (Linux/BSD)
+        if not (hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT')):
+            workers = 1
+        self.workers = max(1, workers)
+        
+        # Bounded handler pool; the semaphore stops the selector loop from
+        # queueing more connections than there are free handler threads
+        self._pool = ThreadPoolExecutor(max_workers=max_handlers, thread_name_prefix='mitm')
+        self._handler_slots = threading.BoundedSemaphore(max_handlers)
+        
+        # (keywords, automaton) for the current blocked keyword set
+        self._keyword_automaton: Optional[tuple] = None
+        
+        # Per-thread scratch buffer for recv_into()
+        self._thread_local = threading.local()
+        
+        # Shared upstream session: handler threads reuse keep-alive (and TLS)
+        # connections per origin instead of handshaking on every request.
+        # Cookies are never stored, so clients cannot see each other's
+        self._session = requests.Session()
+        self._session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = _UpstreamAdapter(pool_connections=64, pool_maxsize=max_handlers, max_retries=0)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        
+        # One server-side SSL context per hostname, reused across connections
+        # so handshakes skip context setup and session tickets can resume.
+        # Tunnels are wrapped with the shared SNI context, which switches to
+        # the per-host one during the handshake
+        self._ssl_contexts: "OrderedDict[str, ssl.SSLContext]" = OrderedDict()
+        self._ssl_contexts_lock = threading.Lock()
+        self._ssl_context = self._create_sni_context()
+        
         # Initialize components
-        self.ca = CertificateAuthority(cert_file, key_file)
-        self.storage = RedisStorage(host=redis_host, port=redis_port)
+        # Host certificates are cached as long as the SSL contexts built from them
+        self.ca = CertificateAuthority(cert_file, key_file, cert_cache_dir, SSL_CONTEXT_CACHE_SIZE)
+        # One Redis connection per handler thread, plus headroom for the API
+        # (the config change listener has its own); the pool is per process,
+        # so the total is this times the worker count
+        self.storage = RedisStorage(
+            host=redis_host,
+            port=redis_port,
+            max_connections=max_handlers + REDIS_POOL_HEADROOM,
+            unix_socket_path=redis_unix_socket
+        )
         self.api = ProxyAPI(self.storage, port=api_port)
         
     def _start_api_server(self) -> None:
@@ -69,34 +290,344 @@ class MITMProxyServer:
     
     def start(self) -> None:
         """Start the proxy server"""
+        server = self._create_server_socket()
+        
+        # Fork workers before any thread exists; the API stays in the parent
+        worker_pids = self._spawn_workers(server)
+        
+        self._remove_stale_cert_dirs()
+        
         # Start API server
         self._start_api_server()
         
-        # Start proxy server
+        logger.info("MITM Proxy listening on %s:%s (%d worker(s))", self.proxy_host, self.proxy_port, self.workers)
+        logger.info("Configure browser proxy to: http://%s:%s", self.proxy_host, self.proxy_port)
+        
+        try:
+            self._serve(server)
+        except KeyboardInterrupt:
+            logger.info("Shutting down proxy server...")
+            # Release handlers blocked on a decision, or exit would join them
+            self.storage.stop_waiting()
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            for pid in worker_pids:
+                _, status = os.waitpid(pid, 0)
+                if status:
+                    logger.warning("Worker %d exited with status %d", pid, os.waitstatus_to_exitcode(status))
+            if not hasattr(os, 'memfd_create'):
+                # Certificates were written to disk: swap the directory out
+                # with one rename; the tree is deleted at the next startup
+                stale_dir = f"{self.cert_cache_dir.rstrip(os.sep)}.stale-{os.getpid()}"
+                try:
+                    os.replace(self.cert_cache_dir, stale_dir)
+                    os.makedirs(self.cert_cache_dir, exist_ok=True)
+                except OSError as e:
+                    logger.warning("Could not reset certificate cache: %s", e)
+            self.storage.flush_all_instances()
+            server.close()
+    
+    def _remove_stale_cert_dirs(self) -> None:
+        """Delete certificate caches set aside by earlier shutdowns, off the startup path"""
+        stale_dirs = glob.glob(f"{glob.escape(self.cert_cache_dir.rstrip(os.sep))}.stale-*")
+        if not stale_dirs:
+            return
+        
+        def remove() -> None:
+            for path in stale_dirs:
+                shutil.rmtree(path, ignore_errors=True)
+        
+        threading.Thread(target=remove, name='stale-cert-cleanup', daemon=True).start()
+    
+    def _create_server_socket(self, cpu: Optional[int] = None) -> socket.socket:
+        """
+        Create the non-blocking listening socket
+        
+        Args:
+            cpu: Core the owning worker is pinned to, if any
+            
+        Returns:
+            Bound and listening server socket
+        """
         server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1) #allows for reuse even when the socket is in the Time_Wait state
+        
+        # Buffer sizes set before listen() are inherited by accepted sockets
+        # and sized into the TCP window advertised during the handshake
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_SEND_BUFFER_SIZE)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_RECV_BUFFER_SIZE)
+        
+        if self.workers > 1:
+            # Every worker binds its own listener; the kernel balances accepts
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            if cpu is not None and hasattr(socket, 'SO_INCOMING_CPU'):
+                # Prefer connections whose packets are processed on our core
+                try:
+                    server.setsockopt(socket.SOL_SOCKET, socket.SO_INCOMING_CPU, cpu)
+                except OSError as e:
+                    logger.warning("Could not set SO_INCOMING_CPU=%s: %s", cpu, e)
         server.bind((self.proxy_host, self.proxy_port))
-        server.listen(5)
+        server.listen(SOCKET_LISTEN_BACKLOG)
+        server.setblocking(False)
+        return server
+    
+    def _spawn_workers(self, parent_server: socket.socket) -> list:
+        """
+        Fork the extra proxy worker processes, each with its own listener
+        
+        Args:
+            parent_server: The parent's listener, closed in every child
+        
+        Returns:
+            List of child process IDs
+        """
+        worker_pids = []
+        # Only cores this process may run on (containers, taskset)
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+        
+        for worker in range(1, self.workers):
+            pid = os.fork()
+            if pid:
+                worker_pids.append(pid)
+                continue
+            
+            # Child: pin to its own core and serve until interrupted
+            status = 0
+            try:
+                parent_server.close()
+                cpu = None
+                if cpus:
+                    cpu = cpus[worker % len(cpus)]
+                    try:
+                        os.sched_setaffinity(0, {cpu})
+                    except OSError as e:
+                        logger.warning("Worker %d could not pin to CPU %s: %s", worker, cpu, e)
+                        cpu = None
+                self._serve(self._create_server_socket(cpu))
+            except KeyboardInterrupt:
+                pass
+            except BaseException:
+                logger.exception("Worker %d crashed", worker)
+                status = 1
+            finally:
+                logging.shutdown()
+                os._exit(status)
         
-        print(f"[+] MITM Proxy listening on {self.proxy_host}:{self.proxy_port}")
-        print(f"[+] Configure browser proxy to: http://{self.proxy_host}:{self.proxy_port}")
+        return worker_pids
+    
+    def _serve(self, server: socket.socket) -> None:
+        """
+        Run the accept/dispatch loop for one listening socket
+        
+        Args:
+            server: Non-blocking listening socket
+        """
+        # The selector owns the listener and every idle connection, so a
+        # handler thread is only spent once a client has actually sent data
+        selector = selectors.DefaultSelector()
+        selector.register(server, selectors.EVENT_READ)
+        # Idle connections in registration order, with their deadlines;
+        # all share one timeout, so the oldest always expires first
+        idle: "OrderedDict[socket.socket, float]" = OrderedDict()
+        log_listener = _start_log_listener()
         
         try:
             while True:
-                client_socket, client_addr = server.accept()
+                for key, _ in selector.select(timeout=1.0 if idle else None):
+                    if key.fileobj is server:
+                        self._accept_clients(server, selector, idle)
+                        continue
+                    
+                    # Client is readable - hand it over to a handler thread
+                    client_socket = key.fileobj
+                    selector.unregister(client_socket)
+                    idle.pop(client_socket, None)
+                    if not self._handler_slots.acquire(blocking=False):
+                        # Every handler is busy: refuse rather than stall
+                        # the loop, which would stop accepts altogether
+                        self._refuse(client_socket)
+                        continue
+                    self._pool.submit(self._run_handler, client_socket, key.data)
                 
-                # Handle client in separate thread
-                thread = threading.Thread(
-                    target=self._handle_client,
-                    args=(client_socket, client_addr),
-                    daemon=True
-                )
-                thread.start()
-        except KeyboardInterrupt:
-            print("\n[*] Shutting down proxy server...")
-            os.system("rm -R ./certs/*")
-            self.storage.flush_all_instances()
-            server.close()
+                # Drop connections that never sent anything (preconnects)
+                now = time.monotonic()
+                while idle:
+                    client_socket, deadline = next(iter(idle.items()))
+                    if deadline > now:
+                        break
+                    del idle[client_socket]
+                    selector.unregister(client_socket)
+                    client_socket.close()
+        finally:
+            for client_socket in idle:
+                client_socket.close()
+            selector.close()
+            if log_listener is not None:
+                _stop_log_listener(log_listener)
+    
+    def _run_handler(self, client_socket: socket.socket, client_addr: tuple) -> None:
+        """Run a client handler on a pool thread and free its slot afterwards"""
+        try:
+            self._handle_client(client_socket, client_addr)
+        finally:
+            self._handler_slots.release()
+    
+    @staticmethod
+    def _refuse(client_socket: socket.socket) -> None:
+        """Answer 503 without blocking the selector loop, then close"""
+        try:
+            client_socket.setblocking(False)
+            client_socket.send(SERVICE_UNAVAILABLE_RESPONSE)
+        except OSError:
+            pass
+        finally:
+            client_socket.close()
+    
+    def _accept_clients(
+        self,
+        server: socket.socket,
+        selector: selectors.BaseSelector,
+        idle: "OrderedDict[socket.socket, float]"
+    ) -> None:
+        """
+        Drain the accept queue and wait for each client's first bytes in the selector
+        
+        Args:
+            server: Non-blocking listening socket
+            selector: Selector the connections are registered with
+            idle: Idle connections and their deadlines, updated in place
+        """
+        deadline = time.monotonic() + REQUEST_TIMEOUT_SECONDS
+        while True:
+            try:
+                client_socket, client_addr = server.accept()
+            except BlockingIOError:
+                return
+            
+            # Handlers use blocking I/O, bounded so a stalled client cannot
+            # hold a handler slot; accept() inheritance is OS dependent
+            client_socket.settimeout(REQUEST_TIMEOUT_SECONDS)
+            # Small replies (CONNECT 200, status lines) must not wait on Nagle
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Let the kernel reap clients that vanish mid-tunnel
+            client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            selector.register(client_socket, selectors.EVENT_READ, data=client_addr)
+            idle[client_socket] = deadline
+    
+    def _recv_request(self, sock: socket.socket, data: bytes = b"") -> bytearray:
+        """
+        Read a complete HTTP request: headers plus a Content-Length or
+        chunked body
+        
+        Headers accumulate in a bytearray through the per-thread scratch
+        buffer, and the terminator search only covers newly received bytes.
+        Once Content-Length is known the request buffer is sized once and
+        the body is received straight into place. Chunked bodies are kept
+        as sent and read until the last chunk. A body over
+        REQUEST_MAX_BODY_SIZE is answered with 413 instead of being read,
+        and headers running past REQUEST_MAX_HEADER_SIZE with 431.
+        
+        Args:
+            sock: Socket to read from (plain or SSL wrapped)
+            data: Bytes already received from the socket
+            
+        Returns:
+            Raw request buffer (shorter if the peer closed early), empty
+            if the request was refused (headers or body too large, or
+            malformed chunk framing)
+        """
+        buffer = bytearray(data)
+        header_end = buffer.find(b'\r\n\r\n')
+        
+        if header_end == -1:
+            chunk = self._recv_scratch()
+            while len(buffer) <= REQUEST_MAX_HEADER_SIZE:
+                received = sock.recv_into(chunk)
+                if not received:
+                    return buffer
+                # Terminator may straddle the previous chunk boundary
+                scan_from = max(0, len(buffer) - 3)
+                buffer += chunk[:received]
+                header_end = buffer.find(b'\r\n\r\n', scan_from)
+                if header_end != -1:
+                    break
+            else:
+                sock.sendall(HEADERS_TOO_LARGE_RESPONSE)
+                return bytearray()
+        
+        if RequestInterceptor.is_chunked(buffer, header_end):
+            return self._recv_chunked(sock, buffer, header_end + 4)
+        
+        content_length = RequestInterceptor.get_content_length(buffer, header_end)
+        if content_length > REQUEST_MAX_BODY_SIZE:
+            # Checked before sizing the buffer from the client's claim
+            sock.sendall(PAYLOAD_TOO_LARGE_RESPONSE)
+            return bytearray()
+        
+        expected = header_end + 4 + content_length
+        filled = len(buffer)
+        if filled >= expected:
+            return buffer
+        
+        request = bytearray(expected)
+        request[:filled] = buffer
+        with memoryview(request) as view:
+            while filled < expected:
+                received = sock.recv_into(view[filled:])
+                if not received:
+                    break
+                filled += received
+        del request[filled:]
+        return request
+    
+    def _recv_chunked(self, sock: socket.socket, buffer: bytearray, body_start: int) -> bytearray:
+        """
+        Keep reading a chunked request body until its last chunk arrives
+        
+        Args:
+            sock: Socket to read from (plain or SSL wrapped)
+            buffer: Request received so far, headers included
+            body_start: Offset of the first chunk-size line
+            
+        Returns:
+            Raw request buffer (shorter if the peer closed early), empty
+            if the body grew past REQUEST_MAX_BODY_SIZE or its framing was
+            malformed
+        """
+        chunk = self._recv_scratch()
+        pos = body_start
+        while True:
+            # Framing already walked is not re-scanned after each recv
+            try:
+                pos, complete = RequestInterceptor.scan_chunked_body(buffer, pos)
+            except ValueError:
+                sock.sendall(BAD_REQUEST_RESPONSE)
+                return bytearray()
+            if complete:
+                del buffer[pos:]
+                return buffer
+            # Chunk framing counts towards the limit, which errs on the safe
+            # side; checked before waiting, as the header read may already
+            # have brought in part of the body
+            if len(buffer) - body_start > REQUEST_MAX_BODY_SIZE:
+                sock.sendall(PAYLOAD_TOO_LARGE_RESPONSE)
+                return bytearray()
+            received = sock.recv_into(chunk)
+            if not received:
+                return buffer
+            buffer += chunk[:received]
+    
+    def _recv_scratch(self) -> memoryview:
+        """
+        Get this thread's reusable receive buffer
+        
+        Returns:
+            Memoryview over a REQUEST_READ_BUFFER_SIZE bytearray
+        """
+        scratch = getattr(self._thread_local, 'recv_scratch', None)
+        if scratch is None:
+            scratch = memoryview(bytearray(REQUEST_READ_BUFFER_SIZE))
+            self._thread_local.recv_scratch = scratch
+        return scratch
     
     def _handle_client(self, client_socket: socket.socket, client_addr: tuple) -> None:
         """
@@ -107,25 +638,29 @@ class MITMProxyServer:
             client_addr: Client address tuple
         """
         try:
-            # Receive initial request
-            data = client_socket.recv(1024)
+            # Receive the full request (headers and any declared body)
+            data = self._recv_request(client_socket)
             
             if not data:
                 client_socket.close()
                 return
             
-            request_line = data.split(b'\r\n')[0].decode()
-            print(f"[*] Connection from {client_addr[0]}:{client_addr[1]}")
-            print(f"[*] Request: {request_line}")
+            # Slice the request line out of the buffer instead of splitting every line
+            line_end = data.find(b'\r\n')
+            request_line_bytes = bytes(data[:line_end] if line_end != -1 else data)
+            # latin-1 maps every byte to one code point, so this cannot fail
+            request_line = request_line_bytes.decode('latin-1')
+            logger.debug("Connection from %s:%s", client_addr[0], client_addr[1])
+            logger.debug("Request: %s", request_line)
             
             # Check if this is a CONNECT request (for HTTPS tunneling)
-            if RequestInterceptor.is_connect_request(request_line):
+            if RequestInterceptor.is_connect_request(request_line_bytes):
                 self._handle_connect_request(client_socket, request_line)
             else:
                 self._handle_http_request(client_socket, request_line, data)
         
         except Exception as e:
-            print(f"[-] Error handling client: {e}")
+            logger.error("Error handling client: %s", e)
         finally:
             client_socket.close()
     
@@ -142,47 +677,155 @@ class MITMProxyServer:
             hostname = RequestInterceptor.extract_hostname(request_line)
             
             if not hostname:
-                client_socket.send(b"HTTP/1.1 400 Bad Request\r\n\r\n")
+                client_socket.sendall(BAD_REQUEST_RESPONSE)
                 return
             
-            # Generate certificate for hostname
-            cert, key = self.ca.generate_certificate(hostname)
-            
-            # Save certificate and key to cache
-            cert_path = os.path.join(self.cert_cache_dir, f"{hostname}.crt")
-            key_path = os.path.join(self.cert_cache_dir, f"{hostname}.key")
-            
-            with open(cert_path, "wb") as f:
-                f.write(cert.public_bytes(serialization.Encoding.PEM))
-            
-            with open(key_path, "wb") as f:
-                f.write(key.private_bytes(
-                    encoding=serialization.Encoding.PEM,
-                    format=serialization.PrivateFormat.TraditionalOpenSSL,
-                    encryption_algorithm=serialization.NoEncryption()
-                ))
-            
             # Send 200 response to establish tunnel
-            client_socket.send(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+            client_socket.sendall(CONNECTION_ESTABLISHED_RESPONSE)
             
-            # Wrap socket with SSL
-            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
-            context.load_cert_chain(cert_path, key_path)
-            ssl_socket = context.wrap_socket(client_socket, server_side=True)
+            # Wrap socket with SSL; the SNI callback picks the host certificate
+            ssl_socket = self._ssl_context.wrap_socket(
+                client_socket,
+                server_side=True,
+                do_handshake_on_connect=False
+            )
+            ssl_socket.tunnel_hostname = hostname
+            ssl_socket.do_handshake()
             
-            print(f"[+] Established HTTPS tunnel to {hostname}")
+            logger.debug("Established HTTPS tunnel to %s", hostname)
             
             # Read encrypted request
             self._read_and_store_request(ssl_socket, hostname)
         
         except Exception as e:
-            print(f"[-] Error handling CONNECT request: {e}")
+            logger.error("Error handling CONNECT request: %s", e)
         finally:
             try:
                 client_socket.close()
             except:
                 pass
     
+    def _select_ssl_context(
+        self,
+        ssl_socket: ssl.SSLSocket,
+        server_name: Optional[str],
+        base_context: ssl.SSLContext
+    ) -> Optional[int]:
+        """
+        SNI callback: switch the handshake to the requested host's context
+        
+        Args:
+            ssl_socket: Socket being handshaken
+            server_name: SNI name sent by the client, None if absent
+            base_context: Shared context the socket was wrapped with
+            
+        Returns:
+            None to continue the handshake, or a TLS alert code on failure
+        """
+        hostname = server_name or getattr(ssl_socket, 'tunnel_hostname', None)
+        if not hostname:
+            return ssl.ALERT_DESCRIPTION_UNRECOGNIZED_NAME
+        try:
+            ssl_socket.context = self._get_ssl_context(hostname)
+        except Exception as e:
+            logger.error("Error preparing certificate for %s: %s", hostname, e)
+            return ssl.ALERT_DESCRIPTION_INTERNAL_ERROR
+        return None
+    
+    def _get_ssl_context(self, hostname: str) -> ssl.SSLContext:
+        """
+        Get the cached server SSL context for a hostname, creating it on first use
+        
+        At most SSL_CONTEXT_CACHE_SIZE contexts are kept; the least recently
+        used host is evicted first.
+        
+        Args:
+            hostname: Hostname the client is tunneling to
+            
+        Returns:
+            SSL context holding the hostname's certificate chain
+        """
+        with self._ssl_contexts_lock:
+            context = self._ssl_contexts.get(hostname)
+            if context is not None:
+                self._ssl_contexts.move_to_end(hostname)
+                return context
+        
+        # Built outside the lock so a new host never stalls other handshakes
+        context = self._create_ssl_context(hostname)
+        with self._ssl_contexts_lock:
+            # Two threads may race on a new host; setdefault keeps the first
+            context = self._ssl_contexts.setdefault(hostname, context)
+            self._ssl_contexts.move_to_end(hostname)
+            while len(self._ssl_contexts) > SSL_CONTEXT_CACHE_SIZE:
+                self._ssl_contexts.popitem(last=False)
+        return context
+    
+    def _create_ssl_context(self, hostname: str) -> ssl.SSLContext:
+        """
+        Generate a certificate for a hostname and build its server SSL context
+        
+        Args:
+            hostname: Hostname to generate the certificate for
+            
+        Returns:
+            Configured SSL context
+        """
+        context = self._new_server_context()
+        if hasattr(os, 'memfd_create'):
+            # load_cert_chain only takes paths: hand it an anonymous
+            # in-memory file so TLS setup never waits on the filesystem
+            fd = os.memfd_create(f"{hostname}.pem", os.MFD_CLOEXEC)
+            try:
+                os.write(fd, self.ca.get_certificate_pem(hostname))
+                context.load_cert_chain(f"/proc/self/fd/{fd}")
+            finally:
+                os.close(fd)
+        else:
+            # Certificate is generated once and persisted by the CA
+            cert_path, key_path = self.ca.get_certificate_files(hostname)
+            context.load_cert_chain(cert_path, key_path)
+        return context
+    
+    def _create_sni_context(self) -> ssl.SSLContext:
+        """
+        Build the shared server SSL context every tunnel is wrapped with
+        
+        It carries no certificate of its own: _select_ssl_context swaps in
+        the per-host context as soon as the ClientHello names the server.
+        
+        Returns:
+            Configured SSL context with the SNI callback installed
+        """
+        context = self._new_server_context()
+        context.sni_callback = self._select_ssl_context
+        return context
+    
+    @staticmethod
+    def _new_server_context() -> ssl.SSLContext:
+        """
+        Create a server SSL context with the proxy's protocol settings
+        
+        Called for the shared SNI context and once per host; the per-host
+        contexts are cached, so this never runs per connection.
+        
+        Returns:
+            SSL context without a certificate chain
+        """
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.minimum_version = ssl.TLSVersion.TLSv1_2
+        context.options |= ssl.OP_NO_COMPRESSION
+        if ssl.HAS_ALPN:
+            # The tunnel only speaks HTTP/1.1; settle it in the handshake
+            # instead of leaving h2-capable clients to fall back
+            context.set_alpn_protocols(['http/1.1'])
+        if SSL_CIPHER_SUITES:
+            context.set_ciphers(SSL_CIPHER_SUITES)
+            # Honour our ordering (AES-GCM before ChaCha20) so AES-NI capable
+            # hosts are not steered onto the software cipher by the client
+            context.options |= ssl.OP_CIPHER_SERVER_PREFERENCE
+        return context
+    
     def _read_and_store_request(self, ssl_socket: socket.socket, hostname: str) -> None:
         """
         Read encrypted request and store to Redis
@@ -192,246 +835,310 @@ class MITMProxyServer:
             hostname: Target hostname
         """
         try:
-            encrypted_data = ssl_socket.recv(4096)
+            encrypted_data = self._recv_request(ssl_socket)
             
             if not encrypted_data:
                 return
             
-            # Decode request safely
-            try:
-                decrypted_request = encrypted_data.decode('utf-8', errors='ignore')
-            except Exception:
-                decrypted_request = "[Binary data]"
-            
-            print(f"[+] Decrypted request:\n{decrypted_request[:200]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Decrypted request:\n%s", encrypted_data[:200].decode('latin-1'))
             
-            # Parse request
-            parsed = RequestInterceptor.parse_request(decrypted_request)
-            method = parsed['method']
-            path = parsed['path']
-            headers = parsed['headers']
-            body = parsed['body']
-            
-            # -----------------------------------------------------------------
-            # Filter Mode Check
-            # -----------------------------------------------------------------
-            if self.storage.get_proxy_mode() == 'filter':
-                # Check Blocked Domains
-                blocked_domains = self.storage.get_blocked_domains()
-                if hostname in blocked_domains:
-                     print(f"[!] Request to {hostname} BLOCKED by Filter Mode")
-                     html_content = "<html><body><h1>Access Denied</h1><p>The domain <b>{}</b> is blocked by the proxy.</p></body></html>".format(hostname)
-                     response = "HTTP/1.1 403 Forbidden\r\nContent-Type: text/html\r\nContent-Length: {}\r\n\r\n{}".format(len(html_content), html_content)
-                     ssl_socket.send(response.encode())
-                     return
-
-                # Forward Request Automatically
-                print(f"[!] Filter Mode: Auto-forwarding to {hostname}...")
-                try:
-                    url = f"https://{hostname}{path}"
-                    response = requests.request(
-                        method=method,
-                        url=url,
-                        headers=headers,
-                        data=body,
-                        verify=False,
-                        allow_redirects=False
-                    )
-                    
-                    # Check Blocked Keywords in Response
-                    blocked_keywords = self.storage.get_blocked_keywords()
-                    resp_content = response.text
-                    
-                    for keyword in blocked_keywords:
-                        if keyword in resp_content:
-                            print(f"[!] Response from {hostname} BLOCKED by Filter Mode (Keyword: {keyword})")
-                            html_content = "<html><body><h1>Access Denied</h1><p>The response contained a blocked keyword: <b>{}</b></p></body></html>".format(keyword)
-                            resp_str = "HTTP/1.1 403 Forbidden\r\nContent-Type: text/html\r\nContent-Length: {}\r\n\r\n{}".format(len(html_content), html_content)
-                            ssl_socket.send(resp_str.encode())
-                            return
-
-                    # Forward Response
-                    status_line = f"HTTP/1.1 {response.status_code} OK\r\n"
-                    ssl_socket.send(status_line.encode())
-                    
-                    for key, value in response.headers.items():
-                        if key.lower() in ['transfer-encoding', 'content-encoding', 'content-length']:
-                            continue
-                        header_line = f"{key}: {value}\r\n"
-                        ssl_socket.send(header_line.encode())
-                    
-                    ssl_socket.send(f"Content-Length: {len(response.content)}\r\n".encode())
-                    ssl_socket.send(b"\r\n")
-                    ssl_socket.send(response.content)
-                    print(f"[+] Response forwarded (Filter Mode)")
-                    return
+            self._proxy_once(ssl_socket, hostname, 'https', RequestInterceptor.parse_request(encrypted_data))
+        
+        except Exception as e:
+            logger.error("Error reading encrypted data: %s", e)
+        finally:
+            try:
+                ssl_socket.close()
+            except:
+                pass
+    
+    def _proxy_once(self, sock: socket.socket, hostname: str, scheme: str, parsed: Dict) -> None:
+        """
+        Apply filter or intercept mode to one parsed request and answer it
+        
+        Shared by the HTTPS tunnel and plain HTTP paths, which only differ
+        in transport setup and the upstream URL scheme.
+        
+        Args:
+            sock: Client socket to answer on (plain or SSL wrapped)
+            hostname: Target hostname
+            scheme: Upstream URL scheme, 'http' or 'https'
+            parsed: Request as returned by RequestInterceptor.parse_request
+        """
+        method = parsed['method']
+        path = parsed['path']
+        headers = parsed['headers']
+        body = parsed['body']
+        
+        # -----------------------------------------------------------------
+        # Filter Mode Check
+        # -----------------------------------------------------------------
+        # Mode and both blocklists arrive in one Redis round-trip
+        filter_config = self.storage.get_filter_config()
+        if filter_config['mode'] == 'filter':
+            # Check Blocked Domains
+            blocked_domains = filter_config['blocked_domains']
+            if hostname in blocked_domains:
+                 logger.info("Request to %s BLOCKED by Filter Mode", hostname)
+                 sock.sendall(_forbidden_response(BLOCKED_DOMAIN_PAGE, hostname))
+                 return
 
-                except Exception as e:
-                    print(f"[-] Error forwarding in Filter Mode: {e}")
-                    ssl_socket.send(b"HTTP/1.1 502 Bad Gateway\r\n\r\nProxy Error")
+            # Forward Request Automatically
+            logger.debug("Filter Mode: Auto-forwarding to %s...", hostname)
+            try:
+                url = self._upstream_url(scheme, hostname, path)
+                blocked_keywords = filter_config['blocked_keywords']
+                # The keyword scan needs the whole body; without
+                # keywords the body is relayed as it arrives
+                response = self._session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    data=body,
+                    verify=False,
+                    allow_redirects=False,
+                    stream=not blocked_keywords,
+                    timeout=UPSTREAM_TIMEOUT
+                )
+                if not blocked_keywords:
+                    self._stream_response(sock, response)
+                    logger.debug("Response streamed (Filter Mode)")
+                    return
+                
+                # Check Blocked Keywords in Response
+                resp_content = response.content
+                
+                # One pass over the body, whatever the number of keywords
+                keyword = self._find_blocked_keyword(resp_content, blocked_keywords)
+                if keyword is not None:
+                    logger.info("Response from %s BLOCKED by Filter Mode (Keyword: %s)", hostname, keyword)
+                    sock.sendall(_forbidden_response(BLOCKED_KEYWORD_PAGE, keyword))
                     return
 
-            # -----------------------------------------------------------------
-            # Intercept Mode (Original Logic)
-            # -----------------------------------------------------------------
-            
-            # Create unique request ID
-            request_id = str(uuid.uuid4())
-            timestamp = datetime.now().isoformat()
-            
-            # Store to Redis
-            self.storage.save_request(
-                request_id=request_id,
-                hostname=hostname,
-                method=method,
-                path=path,
-                headers=headers,
-                body=body,
-                timestamp=timestamp
-            )
-            
-            print(f"[+] Request {request_id} saved to Redis")
-            print(f"[*] Waiting for GUI decision...")
-            
-            # Wait for GUI decision (max 30 seconds)
-            # Wait for GUI decision (max 60 seconds)
-            max_wait = 60
-            waited = 0
-            status = 'pending'
-            
-            while waited < max_wait:
-                status = self.storage.get_request_status(request_id)
-                if status != 'pending':
-                    print(f"[+] Request status: {status}")
-                    break
-                time.sleep(0.5)
-                waited += 0.5
+                # Forward Response, head and body in a single write
+                head = [f"HTTP/1.1 {response.status_code} OK\r\n"]
+                for key, value in response.headers.items():
+                    if key.lower() in SKIPPED_RESPONSE_HEADERS:
+                        continue
+                    head.append(f"{key}: {value}\r\n")
+                head.append(f"Content-Length: {len(response.content)}\r\n\r\n")
+                sock.sendall(b"".join(("".join(head).encode(), response.content)))
+                logger.debug("Response forwarded (Filter Mode)")
+                return
+
+            except requests.Timeout as e:
+                logger.warning("Upstream timeout in Filter Mode: %s", e)
+                sock.sendall(UPSTREAM_TIMEOUT_RESPONSE)
+                return
+            except Exception as e:
+                logger.error("Error forwarding in Filter Mode: %s", e)
+                sock.sendall(BAD_GATEWAY_RESPONSE)
+                return
+
+        # -----------------------------------------------------------------
+        # Intercept Mode (Original Logic)
+        # -----------------------------------------------------------------
+        
+        # Create unique request ID
+        request_id = _new_request_id()
+        timestamp = _request_timestamp()
+        
+        # Store to Redis
+        self.storage.save_request(
+            request_id=request_id,
+            hostname=hostname,
+            method=method,
+            path=path,
+            headers=headers,
+            body=body,
+            timestamp=timestamp
+        )
+        
+        logger.debug("Request %s saved to Redis", request_id)
+        logger.debug("Waiting for GUI decision...")
+        
+        # Block until the GUI decides (max 60 seconds)
+        max_wait = 60
+        status = self.storage.wait_for_request_status(request_id, max_wait)
+        if status != 'pending':
+            logger.debug("Request status: %s", status)
+        
+        # Handle based on status
+        if status == 'blocked':
+            logger.info("Request blocked by user")
+            sock.sendall(BLOCKED_RESPONSE)
+        
+        elif status == 'allowed':
+            # Reload request data in case it was modified
+            req_data = self.storage.get_request(request_id)
+            if req_data:
+                method = req_data['method']
+                path = req_data['path']
+                headers = req_data['headers']
+                # Body is stored raw, edited or not
+                if 'body' in req_data:
+                    body = req_data['body']
             
-            # Handle based on status
-            if status == 'blocked':
-                print(f"[!] Request blocked by user")
-                ssl_socket.send(b"HTTP/1.1 403 Forbidden\r\n\r\nBlocked by proxy")
+            # Remove Accept-Encoding (any casing) to avoid compressed responses we can't handle (like brotli)
+            # requests will add its own acceptable encodings (gzip, deflate) and decode automatically
+            headers = {k: v for k, v in headers.items() if k.lower() != 'accept-encoding'}
+
+            logger.debug("Request allowed - Forwarding to %s...", hostname)
             
-            elif status == 'allowed':
-                # Reload request data in case it was modified
-                req_data = self.storage.get_request(request_id)
-                if req_data:
-                    method = req_data['method']
-                    path = req_data['path']
-                    headers = req_data['headers']
-                    # Check if body was modified (stored as string/hex)
-                    # For now assume string if modified
-                    if 'body' in req_data:
-                        body = req_data['body']
+            try:
+                url = self._upstream_url(scheme, hostname, path)
                 
-                # Remove Accept-Encoding to avoid compressed responses we can't handle (like brotli)
-                # requests will add its own acceptable encodings (gzip, deflate) and decode automatically
-                if 'Accept-Encoding' in headers:
-                    del headers['Accept-Encoding']
-                # Case-insensitive check just in case
-                for k in list(headers.keys()):
-                    if k.lower() == 'accept-encoding':
-                        del headers[k]
-
-                print(f"[!] Request allowed - Forwarding to {hostname}...")
+                # Forward request using requests library
+                response = self._session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    data=body,
+                    verify=False,  # Ignore SSL verify for upstream
+                    allow_redirects=False,
+                    timeout=UPSTREAM_TIMEOUT
+                )
                 
-                try:
-                    # Construct URL
-                    url = f"https://{hostname}{path}"
-                    
-                    # Forward request using requests library
-                    response = requests.request(
-                        method=method,
-                        url=url,
-                        headers=headers,
-                        data=body,
-                        verify=False,  # Ignore SSL verify for upstream
-                        allow_redirects=False 
-                    )
-                    
-                    print(f"[+] Received response from server: {response.status_code}")
-                    
-                    # Save response to Redis
-                    self.storage.save_response(
-                        request_id=request_id,
-                        status_code=response.status_code,
-                        headers=dict(response.headers),
-                        body=response.text 
-                    )
-                    
-                    # Wait for Response Decision
-                    print(f"[*] Waiting for RESPONSE decision...")
-                    resp_waited = 0
-                    resp_status = 'pending'
-                    while resp_waited < max_wait:
-                        resp_status = self.storage.get_response_status(request_id)
-                        if resp_status != 'pending':
-                             break
-                        time.sleep(0.5)
-                        resp_waited += 0.5
-                    
-                    if resp_status == 'allowed':
-                        # Reload response data in case it was modified
-                        stored_resp = self.storage.get_response(request_id)
-                        resp_status_code = response.status_code
-                        resp_headers = dict(response.headers)
-                        resp_body = response.content
-                        
-                        if stored_resp:
-                            resp_status_code = int(stored_resp.get('status_code', response.status_code))
-                            resp_headers = stored_resp.get('headers', resp_headers)
-                            resp_body_str = stored_resp.get('body')
-                            if resp_body_str is not None:
-                                resp_body = resp_body_str.encode('utf-8')
-
-                        # Send response back to client
-                        # Construct status line
-                        status_line = f"HTTP/1.1 {resp_status_code} OK\r\n" # Simplified reason
-                        ssl_socket.send(status_line.encode())
-                        
-                        # Send headers
-                        for key, value in resp_headers.items():
-                            if key.lower() == 'transfer-encoding' or key.lower() == 'content-encoding':
-                                continue
-                            # Update content-length if body changed
-                            if key.lower() == 'content-length':
-                                value = str(len(resp_body))
-                                
-                            header_line = f"{key}: {value}\r\n"
-                            ssl_socket.send(header_line.encode())
-                        
-                        ssl_socket.send(b"\r\n")
-                        
-                        # Send body
-                        ssl_socket.send(resp_body)
-                        print(f"[+] Response forwarded to client")
-                        
-                    elif resp_status == 'blocked':
-                         ssl_socket.send(b"HTTP/1.1 403 Forbidden\r\n\r\nBlocked by proxy")
-                    else:
-                         ssl_socket.send(b"HTTP/1.1 504 Gateway Timeout\r\n\r\nResponse decision timeout")
+                logger.debug("Received response from server: %s", response.status_code)
+                
+                # Save response to Redis
+                self.storage.save_response(
+                    request_id=request_id,
+                    status_code=response.status_code,
+                    headers=dict(response.headers),
+                    body=response.content
+                )
+                
+                # Wait for Response Decision
+                logger.debug("Waiting for RESPONSE decision...")
+                resp_status = self.storage.wait_for_response_status(request_id, max_wait)
+                
+                if resp_status == 'allowed':
+                    # Reload response data in case it was modified
+                    stored_resp = self.storage.get_response(request_id)
+                    resp_status_code = response.status_code
+                    resp_headers = dict(response.headers)
+                    resp_body = response.content
                     
-                except Exception as e:
-                    print(f"[-] Error forwarding HTTPS request: {e}")
-                    ssl_socket.send(b"HTTP/1.1 502 Bad Gateway\r\n\r\nProxy Error")
+                    if stored_resp:
+                        resp_status_code = int(stored_resp.get('status_code', response.status_code))
+                        resp_headers = stored_resp.get('headers', resp_headers)
+                        resp_body = stored_resp.get('body', resp_body)
+
+                    # Send response back to client, head and body in a single write
+                    head = [f"HTTP/1.1 {resp_status_code} OK\r\n"]  # Simplified reason
+                    for key, value in resp_headers.items():
+                        if key.lower() in SKIPPED_RESPONSE_HEADERS:
+                            continue
+                        head.append(f"{key}: {value}\r\n")
+                    # Length of the body actually sent, which may have been edited
+                    head.append(f"Content-Length: {len(resp_body)}\r\n\r\n")
+                    sock.sendall(b"".join(("".join(head).encode(), resp_body)))
+                    logger.debug("Response forwarded to client")
                     
-            elif status == 'modified':
-                # Similar to allowed but use modified body/headers if implemented
-                print(f"[!] Request modified (using allowed path for now)")
-                # For now fallthrough to blocked or implement same as allowed but with modified data
-                ssl_socket.send(b"HTTP/1.1 501 Not Implemented\r\n\r\nModified requests not yet implemented")
+                elif resp_status == 'blocked':
+                     sock.sendall(BLOCKED_RESPONSE)
+                else:
+                     sock.sendall(RESPONSE_DECISION_TIMEOUT_RESPONSE)
                 
-            else:
-                print(f"[-] Timeout waiting for decision")
-                ssl_socket.send(b"HTTP/1.1 408 Request Timeout\r\n\r\n")
+            except requests.Timeout as e:
+                logger.warning("Upstream timeout forwarding %s request: %s", scheme.upper(), e)
+                sock.sendall(UPSTREAM_TIMEOUT_RESPONSE)
+            except Exception as e:
+                logger.error("Error forwarding %s request: %s", scheme.upper(), e)
+                sock.sendall(BAD_GATEWAY_RESPONSE)
+                
+        elif status == 'modified':
+            # Similar to allowed but use modified body/headers if implemented
+            logger.info("Request modified (using allowed path for now)")
+            # For now fallthrough to blocked or implement same as allowed but with modified data
+            sock.sendall(NOT_IMPLEMENTED_RESPONSE)
+            
+        else:
+            logger.warning("Timeout waiting for decision")
+            sock.sendall(REQUEST_TIMEOUT_RESPONSE)
+    
+    @staticmethod
+    def _upstream_url(scheme: str, hostname: str, path: str) -> str:
+        """
+        Build the upstream URL, keeping absolute-form request targets as sent
         
-        except Exception as e:
-            print(f"[-] Error reading encrypted data: {e}")
+        Args:
+            scheme: 'http' or 'https'
+            hostname: Target hostname
+            path: Request target from the request line
+            
+        Returns:
+            Absolute upstream URL
+        """
+        if path.startswith(f"{scheme}://"):
+            return path
+        clean_path = path if path.startswith('/') else f"/{path}"
+        return f"{scheme}://{hostname}{clean_path}"
+    
+    def _stream_response(self, sock: socket.socket, response: requests.Response) -> None:
+        """
+        Relay a streamed upstream response without holding its body
+        
+        The body is passed through still content-encoded, so the upstream
+        Content-Encoding and Content-Length remain valid. Responses without
+        a length are delimited by closing the connection.
+        
+        Args:
+            sock: Client socket (plain or SSL wrapped)
+            response: Upstream response opened with stream=True
+        """
+        try:
+            head = [f"HTTP/1.1 {response.status_code} OK\r\n"]
+            for key, value in response.headers.items():
+                if key.lower() in STREAMED_SKIPPED_RESPONSE_HEADERS:
+                    continue
+                head.append(f"{key}: {value}\r\n")
+            length = response.headers.get('Content-Length')
+            if length is not None:
+                head.append(f"Content-Length: {length}\r\n")
+            head.append("Connection: close\r\n\r\n")
+            sock.sendall("".join(head).encode())
+            for chunk in response.raw.stream(RESPONSE_STREAM_CHUNK_SIZE, decode_content=False):
+                sock.sendall(chunk)
         finally:
-            try:
-                ssl_socket.close()
-            except:
-                pass
+            response.close()
+    
+    def _find_blocked_keyword(self, content: bytes, keywords: tuple) -> Optional[str]:
+        """
+        Find the first blocked keyword occurring in a response body
+        
+        The keywords are compiled into one Aho-Corasick automaton, rebuilt
+        only when the keyword set changes, so the body is scanned once.
+        Matching runs on the raw bytes: keywords are stored by their UTF-8
+        bytes and the body is viewed through latin-1, a 1:1 byte mapping,
+        so no charset detection or UTF-8 decode of the body is needed.
+        
+        Args:
+            content: Raw response body
+            keywords: Blocked keywords (sorted tuple from the filter config)
+            
+        Returns:
+            The matched keyword, None if the body is clean
+        """
+        cached = self._keyword_automaton
+        if cached is None or cached[0] != keywords:
+            automaton = ahocorasick.Automaton()
+            for keyword in keywords:
+                if keyword:
+                    automaton.add_word(keyword.encode('utf-8').decode('latin-1'), keyword)
+            if len(automaton):
+                automaton.make_automaton()
+            else:
+                automaton = None  # Nothing to match
+            cached = self._keyword_automaton = (keywords, automaton)
+        
+        if cached[1] is None:
+            return None
+        for _, keyword in cached[1].iter(content.decode('latin-1')):
+            return keyword
+        return None
     
     def _handle_http_request(self, client_socket: socket.socket, request_line: str, initial_data: bytes) -> None:
         """
@@ -440,246 +1147,34 @@ class MITMProxyServer:
         Args:
             client_socket: Client socket
             request_line: HTTP request line
-            initial_data: Initial data received from client
+            initial_data: Complete request received from client
         """
         try:
-            # Decode request
-            try:
-                request_str = initial_data.decode('utf-8', errors='ignore')
-            except Exception:
-                request_str = "[Binary data]"
-            
-            print(f"[+] HTTP request received:\n{request_str[:200]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("HTTP request received:\n%s", initial_data[:200].decode('latin-1'))
             
             # Parse request
-            parsed = RequestInterceptor.parse_request(request_str)
-            method = parsed['method']
+            parsed = RequestInterceptor.parse_request(initial_data)
             path = parsed['path']
-            headers = parsed['headers']
-            body = parsed['body']
             
             # Extract hostname from Host header
-            hostname = headers.get('Host', '')
+            hostname = parsed['headers'].get('Host', '')
             if not hostname:
                  # Fallback if full URL in path
                  if '://' in path:
                      hostname = path.split('://')[1].split('/')[0]
             
-            # -----------------------------------------------------------------
-            # Filter Mode Check
-            # -----------------------------------------------------------------
-            if self.storage.get_proxy_mode() == 'filter':
-                # Check Blocked Domains
-                blocked_domains = self.storage.get_blocked_domains()
-                if hostname in blocked_domains:
-                     print(f"[!] Request to {hostname} BLOCKED by Filter Mode")
-                     html_content = "<html><body><h1>Access Denied</h1><p>The domain <b>{}</b> is blocked by the proxy.</p></body></html>".format(hostname)
-                     response = "HTTP/1.1 403 Forbidden\r\nContent-Type: text/html\r\nContent-Length: {}\r\n\r\n{}".format(len(html_content), html_content)
-                     client_socket.send(response.encode())
-                     return
-
-                # Forward Request Automatically
-                print(f"[!] Filter Mode: Auto-forwarding to {hostname}...")
-                try:
-                    if path.startswith('http://'):
-                         url = path
-                    else:
-                         clean_path = path if path.startswith('/') else f"/{path}"
-                         url = f"http://{hostname}{clean_path}"
-                    
-                    response = requests.request(
-                        method=method,
-                        url=url,
-                        headers=headers,
-                        data=body,
-                        allow_redirects=False
-                    )
-                    
-                    # Check Blocked Keywords in Response
-                    blocked_keywords = self.storage.get_blocked_keywords()
-                    resp_content = response.text
-                    
-                    for keyword in blocked_keywords:
-                        if keyword in resp_content:
-                            print(f"[!] Response from {hostname} BLOCKED by Filter Mode (Keyword: {keyword})")
-                            html_content = "<html><body><h1>Access Denied</h1><p>The response contained a blocked keyword: <b>{}</b></p></body></html>".format(keyword)
-                            resp_str = "HTTP/1.1 403 Forbidden\r\nContent-Type: text/html\r\nContent-Length: {}\r\n\r\n{}".format(len(html_content), html_content)
-                            client_socket.send(resp_str.encode())
-                            return
-
-                    # Forward Response
-                    status_line = f"HTTP/1.1 {response.status_code} OK\r\n"
-                    client_socket.send(status_line.encode())
-                    
-                    for key, value in response.headers.items():
-                        if key.lower() in ['transfer-encoding', 'content-encoding', 'content-length']:
-                            continue
-                        header_line = f"{key}: {value}\r\n"
-                        client_socket.send(header_line.encode())
-                    
-                    client_socket.send(f"Content-Length: {len(response.content)}\r\n".encode())
-                    client_socket.send(b"\r\n")
-                    client_socket.send(response.content)
-                    print(f"[+] Response forwarded (Filter Mode)")
-                    return
-
-                except Exception as e:
-                    print(f"[-] Error forwarding in Filter Mode: {e}")
-                    client_socket.send(b"HTTP/1.1 502 Bad Gateway\r\n\r\nProxy Error")
-                    return
-
-            # -----------------------------------------------------------------
-            # Intercept Mode (Original Logic)
-            # -----------------------------------------------------------------
-
-            # Create unique request ID
-            request_id = str(uuid.uuid4())
-            timestamp = datetime.now().isoformat()
-            
-            # Store to Redis
-            self.storage.save_request(
-                request_id=request_id,
-                hostname=hostname,
-                method=method,
-                path=path,
-                headers=headers,
-                body=body,
-                timestamp=timestamp
-            )
-            
-            print(f"[+] Request {request_id} saved to Redis")
-            print(f"[*] Waiting for GUI decision...")
-            
-            # Wait for GUI decision (max 60 seconds)
-            max_wait = 60
-            waited = 0
-            status = 'pending'
-            
-            while waited < max_wait:
-                status = self.storage.get_request_status(request_id)
-                if status != 'pending':
-                    print(f"[+] Request status: {status}")
-                    break
-                time.sleep(0.5)
-                waited += 0.5
-                
-            # Handle based on status
-            if status == 'blocked':
-                print(f"[!] Request blocked by user")
-                client_socket.send(b"HTTP/1.1 403 Forbidden\r\n\r\nBlocked by proxy")
-                
-            elif status == 'allowed':
-                # Reload request data in case it was modified
-                req_data = self.storage.get_request(request_id)
-                if req_data:
-                    method = req_data['method']
-                    path = req_data['path']
-                    headers = req_data['headers']
-                    if 'body' in req_data:
-                        body = req_data['body']
-
-                # Remove Accept-Encoding to avoid compressed responses we can't handle (like brotli)
-                if 'Accept-Encoding' in headers:
-                    del headers['Accept-Encoding']
-                for k in list(headers.keys()):
-                    if k.lower() == 'accept-encoding':
-                        del headers[k]
-
-                print(f"[!] Request allowed - Forwarding to {hostname}...")
-                
-                try:
-                    # Construct URL. Handle if path is already full URL
-                    if path.startswith('http://'):
-                         url = path
-                    else:
-                         clean_path = path if path.startswith('/') else f"/{path}"
-                         url = f"http://{hostname}{clean_path}"
-                    
-                    # Forward request using requests library
-                    response = requests.request(
-                        method=method,
-                        url=url,
-                        headers=headers,
-                        data=body,
-                        allow_redirects=False
-                    )
-                    
-                    print(f"[+] Received response from server: {response.status_code}")
-                    
-                    # Save response to Redis
-                    self.storage.save_response(
-                        request_id=request_id,
-                        status_code=response.status_code,
-                        headers=dict(response.headers),
-                        body=response.text
-                    )
-                    
-                    # Wait for Response Decision
-                    print(f"[*] Waiting for RESPONSE decision...")
-                    resp_waited = 0
-                    resp_status = 'pending'
-                    while resp_waited < max_wait:
-                        resp_status = self.storage.get_response_status(request_id)
-                        if resp_status != 'pending':
-                             break
-                        time.sleep(0.5)
-                        resp_waited += 0.5
-                    
-                    if resp_status == 'allowed':
-                        # Reload response data in case it was modified
-                        stored_resp = self.storage.get_response(request_id)
-                        resp_status_code = response.status_code
-                        resp_headers = dict(response.headers)
-                        resp_body = response.content
-                        
-                        if stored_resp:
-                            resp_status_code = int(stored_resp.get('status_code', response.status_code))
-                            resp_headers = stored_resp.get('headers', resp_headers)
-                            resp_body_str = stored_resp.get('body')
-                            if resp_body_str is not None:
-                                resp_body = resp_body_str.encode('utf-8')
-
-                        # Send response back to client
-                        status_line = f"HTTP/1.1 {resp_status_code} OK\r\n"
-                        client_socket.send(status_line.encode())
-                        
-                        # Send headers
-                        for key, value in resp_headers.items():
-                            if key.lower() == 'transfer-encoding' or key.lower() == 'content-encoding':
-                                continue
-                            if key.lower() == 'content-length':
-                                value = str(len(resp_body))
-                            header_line = f"{key}: {value}\r\n"
-                            client_socket.send(header_line.encode())
-                        
-                        client_socket.send(b"\r\n")
-                        
-                        # Send body
-                        client_socket.send(resp_body)
-                        print(f"[+] Response forwarded to client")
-                        
-                    elif resp_status == 'blocked':
-                         client_socket.send(b"HTTP/1.1 403 Forbidden\r\n\r\nBlocked by proxy")
-                    else:
-                         client_socket.send(b"HTTP/1.1 504 Gateway Timeout\r\n\r\nResponse decision timeout")
-                    
-                except Exception as e:
-                    print(f"[-] Error forwarding HTTP request: {e}")
-                    client_socket.send(b"HTTP/1.1 502 Bad Gateway\r\n\r\nProxy Error")
-                    
-            elif status == 'modified':
-                 client_socket.send(b"HTTP/1.1 501 Not Implemented\r\n\r\nModified requests not yet implemented")
-                 
-            else:
-                 print(f"[-] Timeout waiting for decision")
-                 client_socket.send(b"HTTP/1.1 408 Request Timeout\r\n\r\n")
+            self._proxy_once(client_socket, hostname, 'http', parsed)
 
         except Exception as e:
-            print(f"[-] Error handling HTTP request: {e}")
+            logger.error("Error handling HTTP request: %s", e)
 
 
 def main():
     """Main entry point"""
+    # Root handler, so storage and API modules log through the same queue
+    logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+    
     proxy = MITMProxyServer(
         proxy_host="127.0.0.1",
         proxy_port=8888,
@@ -688,7 +1183,12 @@ def main():
         key_file="ca_key.pem",
         cert_cache_dir="certs",
         redis_host="localhost",
-        redis_port=6379
+        redis_port=6379,
+        redis_unix_socket=REDIS_UNIX_SOCKET,
+        workers=PROXY_WORKERS,
+        # Split the handler budget so more workers do not multiply the
+        # thread count and the Redis connections sized from it
+        max_handlers=max(1, -(-PROXY_MAX_HANDLERS // max(1, PROXY_WORKERS)))
     )
     
     proxy.start()
@@ -3,15 +3,164 @@ Redis Storage Module
 Handles storing and retrieving intercepted requests from Redis database
 """
 
-import json
+import time
+import itertools
+import logging
+import threading
 import redis
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Union
+
+
+class _FailureWindowFilter(logging.Filter):
+    """
+    Let each message template through at most once per window
+    
+    During a Redis outage every call fails the same way; one line per
+    window (with a count of what was suppressed) keeps callers from
+    queueing behind log I/O.
+    """
+    
+    def __init__(self, window: float):
+        super().__init__()
+        self.window = window
+        self._last: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._last.get(record.msg, (None, 0))
+            if last is not None and now - last < self.window:
+                self._last[record.msg] = (last, suppressed + 1)
+                return False
+            self._last[record.msg] = (now, 0)
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar suppressed)"
+        return True
+
+
+logger = logging.getLogger(__name__)
+logger.addFilter(_FailureWindowFilter(5.0))
+
+
+# Hash field prefix for headers: each header is its own field, keyed by its
+# lowercased name, so a single header is one HGET with nothing to unpack
+_HEADER_PREFIX = 'h:'
+
+
+def _header_fields(headers: Dict[str, str]) -> Dict[str, str]:
+    """Flatten a headers dictionary into prefixed hash fields"""
+    return {f"{_HEADER_PREFIX}{name.lower()}": value for name, value in headers.items()}
+
+
+# KEYS: request hash, pending index (sorted set scored by arrival time in ms).
+# ARGV: ttl, request id, score, expiry cutoff score, pending cap,
+# field/value pairs.
+# Runs server-side so the hash, its TTL and its pending entry appear
+# atomically; index entries older than the TTL point at expired hashes
+# and are pruned on the way. Past the cap, the oldest requests are
+# dropped together with their hashes.
+_SAVE_REQUEST_SCRIPT = """
+redis.call('HSET', KEYS[1], unpack(ARGV, 6))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', '(' .. ARGV[4])
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[5])
+if excess > 0 then
+    local prefix = string.sub(KEYS[1], 1, #KEYS[1] - #ARGV[2])
+    for _, id in ipairs(redis.call('ZRANGE', KEYS[2], 0, excess - 1)) do
+        redis.call('UNLINK', prefix .. id)
+    end
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, excess - 1)
+end
+return 1
+"""
+
+# KEYS: request or response hash; ARGV: field/value pairs to set.
+# Drops every stored header field before writing the new ones, so a
+# header removed by an edit does not survive it
+_REPLACE_HEADERS_SCRIPT = """
+for _, field in ipairs(redis.call('HKEYS', KEYS[1])) do
+    if string.sub(field, 1, 2) == 'h:' then
+        redis.call('HDEL', KEYS[1], field)
+    end
+end
+if #ARGV > 0 then
+    redis.call('HSET', KEYS[1], unpack(ARGV))
+end
+return 1
+"""
+
+# KEYS: pending index; ARGV: hash key prefix, then summary field names.
+# Pending IDs (newest first) and their listing fields in one call;
+# entries whose hash has already expired are skipped
+_PENDING_SUMMARIES_SCRIPT = """
+local rows = {}
+for _, id in ipairs(redis.call('ZREVRANGE', KEYS[1], 0, -1)) do
+    local row = redis.call('HMGET', ARGV[1] .. id, unpack(ARGV, 2))
+    if row[1] then
+        rows[#rows + 1] = row
+    end
+end
+return rows
+"""
+
+# Lifetime of a stored request hash, in seconds
+_REQUEST_TTL = 3600
+
+# Most pending requests kept; older ones are dropped as new ones arrive
+_MAX_PENDING = 10_000
+
+# How long a process reuses its snapshot of the mode and blocklists, in
+# seconds. Changes are pushed over _CONFIG_CHANNEL; the TTL only bounds how
+# long a missed notification can go unnoticed
+_FILTER_CONFIG_TTL = 30.0
+
+# Snapshot lifetime while the change listener is not (yet) subscribed, when
+# no notification can arrive
+_UNSUBSCRIBED_CONFIG_TTL = 1.0
+
+# Pub/sub channel announcing a change to the mode or a blocklist
+_CONFIG_CHANNEL = "proxy_config:changed"
+
+# Longest single BLPOP of a decision wait, in seconds; between slices the
+# wait checks whether the process is shutting down
+_WAIT_SLICE = 1.0
+
+# Socket read/write timeout for pooled connections, in seconds. Decision
+# waits block for at most one _WAIT_SLICE per BLPOP, so anything longer
+# means Redis stopped answering
+_SOCKET_TIMEOUT = _WAIT_SLICE + 4.0
+
+# Socket connect timeout, in seconds
+_CONNECT_TIMEOUT = 2.0
+
+# Keys removed per UNLINK command when clearing every request
+_CLEAR_BATCH_SIZE = 500
+
+# Keys examined per SCAN step when clearing every request
+_CLEAR_SCAN_COUNT = 1000
+
+# Request hash fields served by the /api/requests listing
+_SUMMARY_FIELDS = ('id', 'hostname', 'method', 'path', 'timestamp')
+
+
+def _decode(value: Optional[bytes]) -> Optional[str]:
+    """Decode a raw Redis string reply"""
+    return value.decode('utf-8', errors='replace') if value is not None else None
 
 
 class RedisStorage:
     """Manages Redis connection and operations for intercepted requests"""
     
-    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0):
+    def __init__(
+        self,
+        host: str = 'localhost',
+        port: int = 6379,
+        db: int = 0,
+        max_connections: int = 64,
+        unix_socket_path: Optional[str] = None
+    ):
         """
         Initialize Redis connection
         
@@ -19,20 +168,75 @@ class RedisStorage:
             host: Redis server host
             port: Redis server port
             db: Redis database number
+            max_connections: Size of the shared connection pool; threads
+                sharing this instance each check out their own connection
+            unix_socket_path: Connect over this UNIX socket instead of
+                host/port, for a Redis on the same machine
         """
-        self.client = redis.Redis(
-            host=host,
-            port=port,
+        # Threads wait (up to 5s) for a free connection instead of opening
+        # sockets past the cap. Idle pooled sockets are kept alive and
+        # PINGed before reuse after 30s, so a dropped connection surfaces
+        # as a reconnect rather than a failed command; a Redis that stops
+        # answering fails commands after _SOCKET_TIMEOUT
+        if unix_socket_path:
+            # Local Redis: skip the loopback TCP stack altogether
+            connection_kwargs = {
+                'connection_class': redis.UnixDomainSocketConnection,
+                'path': unix_socket_path,
+            }
+        else:
+            connection_kwargs = {'host': host, 'port': port, 'socket_keepalive': True}
+        pool = redis.BlockingConnectionPool(
             db=db,
-            decode_responses=True
+            max_connections=max_connections,
+            timeout=5,
+            health_check_interval=30,
+            socket_timeout=_SOCKET_TIMEOUT,
+            socket_connect_timeout=_CONNECT_TIMEOUT,
+            **connection_kwargs
         )
+        self.client = redis.Redis(connection_pool=pool)
+        # The config change listener idles in a read between messages, so
+        # it gets its own connection without a read timeout
+        self._pubsub_client = redis.Redis(connection_pool=redis.ConnectionPool(
+            db=db,
+            socket_timeout=None,
+            socket_connect_timeout=_CONNECT_TIMEOUT,
+            **connection_kwargs
+        ))
+        
+        # (monotonic expiry, generation, config) snapshot served by
+        # get_filter_config; only valid while the generation is current
+        self._filter_config_cache: Optional[Tuple[float, int, Dict[str, Any]]] = None
+        # Bumped on every announced change; next() on a count is atomic
+        self._config_generations = itertools.count(1)
+        self._config_generation = 0
+        # Thread bumping the generation on _CONFIG_CHANNEL, started on first
+        # use; the event is set while its subscription is confirmed
+        self._config_listener: Optional[threading.Thread] = None
+        self._config_listener_lock = threading.Lock()
+        self._config_subscribed = threading.Event()
+        # Set on shutdown to end every decision wait in this process
+        self._stopping = threading.Event()
         
-        # Test connection
+        # Invoked via EVALSHA, reloaded transparently on NOSCRIPT
+        self._save_request_script = self.client.register_script(_SAVE_REQUEST_SCRIPT)
+        self._pending_summaries_script = self.client.register_script(_PENDING_SUMMARIES_SCRIPT)
+        self._replace_headers_script = self.client.register_script(_REPLACE_HEADERS_SCRIPT)
+        
+        # Client methods used on every intercepted request, bound once
+        self._pipeline = self.client.pipeline
+        self._hgetall = self.client.hgetall
+        self._hget = self.client.hget
+        self._hset = self.client.hset
+        self._blpop = self.client.blpop
+        
+        # Test connection (also opens the first pooled socket)
         try:
             self.client.ping()
-            print(f"[+] Connected to Redis at {host}:{port}")
+            logger.info("Connected to Redis at %s:%s", host, port)
         except redis.ConnectionError as e:
-            print(f"[-] Failed to connect to Redis: {e}")
+            logger.error("Failed to connect to Redis: %s", e)
             raise
     
     def save_request(
@@ -42,7 +246,7 @@ class RedisStorage:
         method: str,
         path: str,
         headers: Dict[str, str],
-        body: str,
+        body: bytes,
         timestamp: str
     ) -> bool:
         """
@@ -54,7 +258,7 @@ class RedisStorage:
             method: HTTP method (GET, POST, etc.)
             path: Request path
             headers: Request headers dictionary
-            body: Request body (hex encoded for binary safety)
+            body: Raw request body, stored as-is
             timestamp: Request timestamp (ISO format)
             
         Returns:
@@ -66,26 +270,27 @@ class RedisStorage:
                 'hostname': hostname,
                 'method': method,
                 'path': path,
-                'headers': json.dumps(headers),
                 'body': body,
                 'timestamp': timestamp,
+                'status': 'pending',
+                **_header_fields(headers),
             }
             
-            # Store request as hash
-            self.client.hset(f"request:{request_id}", mapping=request_data)
-            
-            # Add to pending list for quick access
-            self.client.lpush("pending_requests", request_id)
-            
-            # Set expiration (1 hour)
-            self.client.expire(f"request:{request_id}", 3600)
-            
-            # Set initial status
-            self.client.hset(f"request:{request_id}", "status", "pending")
+            # Store hash, expiration (1 hour) and pending-index entry in a
+            # single atomic round-trip
+            now_ms = int(time.time() * 1000)
+            args = [_REQUEST_TTL, request_id, now_ms, now_ms - _REQUEST_TTL * 1000, _MAX_PENDING]
+            for field, value in request_data.items():
+                args.append(field)
+                args.append(value)
+            self._save_request_script(
+                keys=[f"request:{request_id}", "pending_requests"],
+                args=args
+            )
             
             return True
         except Exception as e:
-            print(f"[-] Error saving request to Redis: {e}")
+            logger.error("Error saving request to Redis: %s", e)
             return False
     
     def get_pending_requests(self) -> List[str]:
@@ -93,15 +298,28 @@ class RedisStorage:
         Get all pending request IDs
         
         Returns:
-            List of request IDs
+            List of request IDs, newest first
         """
         try:
-            pending_ids = self.client.lrange("pending_requests", 0, -1)
-            return pending_ids
+            pending_ids = self.client.zrevrange("pending_requests", 0, -1)
+            return [_decode(req_id) for req_id in pending_ids]
         except Exception as e:
-            print(f"[-] Error fetching pending requests: {e}")
+            logger.error("Error fetching pending requests: %s", e)
             return []
     
+    def count_pending_requests(self) -> int:
+        """
+        Count pending requests without transferring their IDs
+        
+        Returns:
+            Number of entries in the pending index
+        """
+        try:
+            return self.client.zcard("pending_requests")
+        except Exception as e:
+            logger.error("Error counting pending requests: %s", e)
+            return 0
+    
     def get_request(self, request_id: str) -> Optional[Dict[str, Any]]:
         """
         Get full request details by ID
@@ -113,22 +331,127 @@ class RedisStorage:
             Dictionary with request data or None if not found
         """
         try:
-            request_data = self.client.hgetall(f"request:{request_id}")
+            request_data = self._hgetall(f"request:{request_id}")
             
             if not request_data:
                 return None
             
-            # Parse headers back from JSON
-            try:
-                request_data['headers'] = json.loads(request_data['headers'])
-            except json.JSONDecodeError:
-                request_data['headers'] = {}
+            return self._decode_hash(request_data)
+        except Exception as e:
+            logger.error("Error retrieving request: %s", e)
+            return None
+    
+    def get_header(self, request_id: str, name: str) -> Optional[str]:
+        """
+        Get a single request header without fetching the rest of the request
+        
+        Args:
+            request_id: The request ID
+            name: Header name (case-insensitive)
             
-            return request_data
+        Returns:
+            Header value or None if the request or header is missing
+        """
+        try:
+            return _decode(self._hget(f"request:{request_id}", f"{_HEADER_PREFIX}{name.lower()}"))
         except Exception as e:
-            print(f"[-] Error retrieving request: {e}")
+            logger.error("Error retrieving header: %s", e)
             return None
     
+    def get_requests(self, request_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get full request details for several IDs in one round-trip
+        
+        Args:
+            request_ids: The request IDs to retrieve
+            
+        Returns:
+            List of request dictionaries (expired or missing IDs are skipped)
+        """
+        try:
+            pipe = self._pipeline(transaction=False)
+            for request_id in request_ids:
+                pipe.hgetall(f"request:{request_id}")
+            results = pipe.execute()
+            
+            decode_hash = self._decode_hash
+            return [decode_hash(request_data) for request_data in results if request_data]
+        except Exception as e:
+            logger.error("Error retrieving requests: %s", e)
+            return []
+    
+    def get_request_summaries(self, request_ids: List[str]) -> List[Dict[str, str]]:
+        """
+        Get the listing fields of several requests in one round-trip
+        
+        Only the summary fields are fetched, so headers and bodies are
+        neither transferred nor decoded.
+        
+        Args:
+            request_ids: The request IDs to retrieve
+            
+        Returns:
+            List of summary dictionaries (expired or missing IDs are skipped)
+        """
+        try:
+            pipe = self._pipeline(transaction=False)
+            for request_id in request_ids:
+                pipe.hmget(f"request:{request_id}", _SUMMARY_FIELDS)
+            results = pipe.execute()
+            
+            return [
+                dict(zip(_SUMMARY_FIELDS, map(_decode, row)))
+                for row in results
+                if row[0] is not None
+            ]
+        except Exception as e:
+            logger.error("Error retrieving request summaries: %s", e)
+            return []
+    
+    def get_pending_summaries(self) -> List[Dict[str, str]]:
+        """
+        Get the listing fields of every pending request in one round-trip
+        
+        The index scan and the per-request HMGETs run server-side, so a
+        GUI refresh costs a single EVALSHA whatever the queue length.
+        
+        Returns:
+            List of summary dictionaries, newest first
+        """
+        try:
+            rows = self._pending_summaries_script(
+                keys=["pending_requests"],
+                args=["request:", *_SUMMARY_FIELDS]
+            )
+            return [dict(zip(_SUMMARY_FIELDS, map(_decode, row))) for row in rows]
+        except Exception as e:
+            logger.error("Error retrieving pending summaries: %s", e)
+            return []
+    
+    @staticmethod
+    def _decode_hash(raw: Dict[bytes, bytes]) -> Dict[str, Any]:
+        """
+        Decode a raw request/response hash into str fields
+        
+        Args:
+            raw: Hash as returned by HGETALL on the binary client
+            
+        Returns:
+            Dictionary with str keys and values, header fields gathered
+            into a 'headers' dictionary; the body is left as bytes
+        """
+        data = {}
+        headers = {}
+        prefix = _HEADER_PREFIX.encode()
+        for key, value in raw.items():
+            if key.startswith(prefix):
+                headers[key[len(prefix):].decode()] = value.decode('utf-8', errors='replace')
+            elif key != b'body':
+                data[key.decode()] = value.decode('utf-8', errors='replace')
+        data['headers'] = headers
+        data['body'] = raw.get(b'body', b'')
+        return data
+    
     
     def update_request_status(self, request_id: str, status: str) -> bool:
         """
@@ -142,10 +465,10 @@ class RedisStorage:
             True if successful, False otherwise
         """
         try:
-            self.client.hset(f"request:{request_id}", "status", status)
+            self._update("request", request_id, status=status)
             return True
         except Exception as e:
-            print(f"[-] Error updating status: {e}")
+            logger.error("Error updating status: %s", e)
             return False
 
     def get_request_status(self, request_id: str) -> str:
@@ -159,13 +482,13 @@ class RedisStorage:
             Status string or 'unknown'
         """
         try:
-            status = self.client.hget(f"request:{request_id}", "status")
-            return status if status else 'unknown'
+            status = self._hget(f"request:{request_id}", "status")
+            return status.decode() if status else 'unknown'
         except Exception as e:
-            print(f"[-] Error getting status: {e}")
+            logger.error("Error getting status: %s", e)
             return 'error'
 
-    def save_response(self, request_id: str, status_code: int, headers: Dict[str, str], body: str) -> bool:
+    def save_response(self, request_id: str, status_code: int, headers: Dict[str, str], body: bytes) -> bool:
         """
         Save response for a request
         
@@ -173,7 +496,7 @@ class RedisStorage:
             request_id: The request ID
             status_code: Response status code
             headers: Response headers
-            body: Response body (hex encoded or string)
+            body: Raw response body bytes
             
         Returns:
             True if successful, False otherwise
@@ -181,15 +504,17 @@ class RedisStorage:
         try:
             response_data = {
                 'status_code': status_code,
-                'headers': json.dumps(headers),
                 'body': body,
-                'status': 'pending'  # Initial status for response interception
+                'status': 'pending',  # Initial status for response interception
+                **_header_fields(headers),
             }
-            self.client.hset(f"response:{request_id}", mapping=response_data)
-            self.client.expire(f"response:{request_id}", 3600)
+            pipe = self._pipeline(transaction=False)
+            pipe.hset(f"response:{request_id}", mapping=response_data)
+            pipe.expire(f"response:{request_id}", 3600)
+            pipe.execute()
             return True
         except Exception as e:
-            print(f"[-] Error saving response: {e}")
+            logger.error("Error saving response: %s", e)
             return False
             
     def get_response(self, request_id: str) -> Optional[Dict[str, Any]]:
@@ -203,18 +528,13 @@ class RedisStorage:
             Dictionary with response data or None
         """
         try:
-            response_data = self.client.hgetall(f"response:{request_id}")
+            response_data = self._hgetall(f"response:{request_id}")
             if not response_data:
                 return None
                 
-            try:
-                response_data['headers'] = json.loads(response_data['headers'])
-            except:
-                response_data['headers'] = {}
-                
-            return response_data
+            return self._decode_hash(response_data)
         except Exception as e:
-            print(f"[-] Error getting response: {e}")
+            logger.error("Error getting response: %s", e)
             return None
 
     def update_response_status(self, request_id: str, status: str) -> bool:
@@ -229,10 +549,10 @@ class RedisStorage:
             True if successful, False otherwise
         """
         try:
-            self.client.hset(f"response:{request_id}", "status", status)
+            self._update("response", request_id, status=status)
             return True
         except Exception as e:
-            print(f"[-] Error updating response status: {e}")
+            logger.error("Error updating response status: %s", e)
             return False
 
     def get_response_status(self, request_id: str) -> str:
@@ -246,62 +566,164 @@ class RedisStorage:
             Status string or 'unknown'
         """
         try:
-            status = self.client.hget(f"response:{request_id}", "status")
-            return status if status else 'unknown'
+            status = self._hget(f"response:{request_id}", "status")
+            return status.decode() if status else 'unknown'
         except Exception as e:
-            print(f"[-] Error getting response status: {e}")
+            logger.error("Error getting response status: %s", e)
             return 'error'
 
-    def update_request_data(self, request_id: str, headers: Optional[Dict] = None, body: Optional[str] = None) -> bool:
+    def wait_for_request_status(self, request_id: str, timeout: float) -> str:
         """
-        Update request headers and body
+        Block until the GUI records a decision for a request
+        
+        Args:
+            request_id: The request ID
+            timeout: Maximum time to wait, in seconds
+            
+        Returns:
+            Decided status, 'pending' on timeout, 'error' on failure
+        """
+        return self._wait_for_status("request", request_id, timeout)
+    
+    def wait_for_response_status(self, request_id: str, timeout: float) -> str:
+        """
+        Block until the GUI records a decision for a response
+        
+        Args:
+            request_id: The request ID
+            timeout: Maximum time to wait, in seconds
+            
+        Returns:
+            Decided status, 'pending' on timeout, 'error' on failure
+        """
+        return self._wait_for_status("response", request_id, timeout)
+    
+    def _update(
+        self,
+        kind: str,
+        request_id: str,
+        headers: Optional[Dict] = None,
+        body: Optional[Union[str, bytes]] = None,
+        status: Optional[str] = None
+    ) -> None:
+        """
+        Write edited data and/or a status in one MULTI/EXEC
+        
+        A status is also pushed onto a per-ID decision list, which the
+        waiting side BLPOPs, so the proxy thread is woken in the same
+        round-trip; a decision made before the wait starts stays queued
+        until it is consumed.
+        
+        Args:
+            kind: "request" or "response"
+            request_id: The request ID
+            headers: New headers, replacing all stored ones (optional)
+            body: New body, text or raw bytes (optional)
+            status: New status (optional)
+        """
+        key = f"{kind}:{request_id}"
+        fields = {}
+        if body is not None:
+            fields['body'] = body
+        if status is not None:
+            fields['status'] = status
+        
+        pipe = self._pipeline(transaction=True)
+        if headers is not None:
+            args = []
+            for field, value in {**fields, **_header_fields(headers)}.items():
+                args.append(field)
+                args.append(value)
+            self._replace_headers_script(keys=[key], args=args, client=pipe)
+        elif fields:
+            pipe.hset(key, mapping=fields)
+        else:
+            return
+        if status is not None:
+            decision_key = f"{key}:decision"
+            pipe.lpush(decision_key, status)
+            pipe.expire(decision_key, _REQUEST_TTL)
+        pipe.execute()
+    
+    def _wait_for_status(self, kind: str, request_id: str, timeout: float) -> str:
+        """
+        Wait for the next decision pushed by _update
+        
+        Args:
+            kind: "request" or "response"
+            request_id: The request ID
+            timeout: Maximum time to wait, in seconds
+            
+        Returns:
+            Decided status, 'pending' on timeout, 'shutdown' once
+            stop_waiting() was called, 'error' on failure
+        """
+        decision_key = f"{kind}:{request_id}:decision"
+        deadline = time.monotonic() + timeout
+        try:
+            # Short slices: flushing Redis does not wake a BLPOP in progress
+            while not self._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return 'pending'
+                result = self._blpop([decision_key], timeout=min(remaining, _WAIT_SLICE))
+                if result:
+                    return result[1].decode()
+            return 'shutdown'
+        except Exception as e:
+            logger.error("Error waiting for %s decision: %s", kind, e)
+            return 'error'
+    
+    def update_request_data(
+        self,
+        request_id: str,
+        headers: Optional[Dict] = None,
+        body: Optional[Union[str, bytes]] = None,
+        status: Optional[str] = None
+    ) -> bool:
+        """
+        Update request headers and body, optionally deciding its status too
         
         Args:
             request_id: The request ID
             headers: New headers (optional)
-            body: New body (optional)
+            body: New body, text or raw bytes (optional)
+            status: New status, written in the same round-trip (optional)
             
         Returns:
             True if successful, False otherwise
         """
         try:
-            updates = {}
-            if headers is not None:
-                updates['headers'] = json.dumps(headers)
-            if body is not None:
-                updates['body'] = body
-                
-            if updates:
-                self.client.hset(f"request:{request_id}", mapping=updates)
+            self._update("request", request_id, headers, body, status)
             return True
         except Exception as e:
-            print(f"[-] Error updating request data: {e}")
+            logger.error("Error updating request data: %s", e)
             return False
 
-    def update_response_data(self, request_id: str, headers: Optional[Dict] = None, body: Optional[str] = None) -> bool:
+    def update_response_data(
+        self,
+        request_id: str,
+        headers: Optional[Dict] = None,
+        body: Optional[Union[str, bytes]] = None,
+        status: Optional[str] = None
+    ) -> bool:
         """
-        Update response headers and body
+        Update response headers and body, optionally deciding its status too
         
         Args:
             request_id: The request ID
             headers: New headers (optional)
-            body: New body (optional)
+            body: New body, text or raw bytes (optional)
+            status: New status, written in the same round-trip (optional)
             
         Returns:
             True if successful, False otherwise
         """
         try:
-            updates = {}
-            if headers is not None:
-                updates['headers'] = json.dumps(headers)
-            if body is not None:
-                updates['body'] = body
-                
-            if updates:
-                self.client.hset(f"response:{request_id}", mapping=updates)
+            self._update("response", request_id, headers, body, status)
             return True
         except Exception as e:
-            print(f"[-] Error updating response data: {e}")
+            logger.error("Error updating response data: %s", e)
             return False
 
     def set_modified_body(self, request_id: str, modified_body: str) -> bool:
@@ -316,10 +738,10 @@ class RedisStorage:
             True if successful, False otherwise
         """
         try:
-            self.client.hset(f"request:{request_id}", "modified_body", modified_body)
+            self._hset(f"request:{request_id}", "modified_body", modified_body)
             return True
         except Exception as e:
-            print(f"[-] Error saving modified body: {e}")
+            logger.error("Error saving modified body: %s", e)
             return False
     
     def get_modified_body(self, request_id: str) -> Optional[str]:
@@ -333,10 +755,10 @@ class RedisStorage:
             Modified body or None if not found
         """
         try:
-            modified_body = self.client.hget(f"request:{request_id}", "modified_body")
-            return modified_body
+            modified_body = self._hget(f"request:{request_id}", "modified_body")
+            return _decode(modified_body)
         except Exception as e:
-            print(f"[-] Error retrieving modified body: {e}")
+            logger.error("Error retrieving modified body: %s", e)
             return None
     
     def delete_request(self, request_id: str) -> bool:
@@ -350,11 +772,17 @@ class RedisStorage:
             True if successful, False otherwise
         """
         try:
-            self.client.delete(f"request:{request_id}")
-            self.client.lrem("pending_requests", 0, request_id)
+            pipe = self._pipeline(transaction=True)
+            # UNLINK: large bodies are reclaimed in the background
+            pipe.unlink(f"request:{request_id}", f"response:{request_id}")
+            pipe.zrem("pending_requests", request_id)
+            # Release a proxy thread still waiting on this request
+            pipe.lpush(f"request:{request_id}:decision", "deleted")
+            pipe.expire(f"request:{request_id}:decision", _REQUEST_TTL)
+            pipe.execute()
             return True
         except Exception as e:
-            print(f"[-] Error deleting request: {e}")
+            logger.error("Error deleting request: %s", e)
             return False
     
     
@@ -366,12 +794,21 @@ class RedisStorage:
             Dictionary with health information
         """
         try:
-            self.client.ping()
-            info = self.client.info()
+            # Only the sections reported below, in one round-trip that
+            # doubles as the liveness check
+            pipe = self._pipeline(transaction=False)
+            pipe.info('server')
+            pipe.info('clients')
+            pipe.info('memory')
+            info = {}
+            for section in pipe.execute():
+                info.update(section)
             return {
                 'status': 'connected',
                 'redis_version': info.get('redis_version', 'unknown'),
-                'connected_clients': info.get('connected_clients', 0)
+                'connected_clients': info.get('connected_clients', 0),
+                'used_memory_peak': info.get('used_memory_peak', 0),
+                'mem_fragmentation_ratio': info.get('mem_fragmentation_ratio', 0)
             }
         except Exception as e:
             return {
@@ -379,6 +816,10 @@ class RedisStorage:
                 'error': str(e)
             }
 
+    def stop_waiting(self) -> None:
+        """End every decision wait in this process within one _WAIT_SLICE"""
+        self._stopping.set()
+
     def flush_all_instances(self) : 
         self.client.flushdb()
 
@@ -393,18 +834,22 @@ class RedisStorage:
             True if successful, False otherwise
         """
         try:
-            # Get all pending request IDs
-            pending_ids = self.client.lrange("pending_requests", 0, -1)
-            
-            # Delete each request
-            for req_id in pending_ids:
-                self.client.delete(f"request:{req_id}")
-            
-            # Clear pending list
-            self.client.delete("pending_requests")
+            # SCAN rather than the pending index, so hashes whose index entry
+            # is already gone (and responses, decision lists) are reclaimed
+            # too; multi-key UNLINKs free the bodies off Redis' main thread
+            for pattern in ("request:*", "response:*"):
+                batch = []
+                for key in self.client.scan_iter(match=pattern, count=_CLEAR_SCAN_COUNT):
+                    batch.append(key)
+                    if len(batch) >= _CLEAR_BATCH_SIZE:
+                        self.client.unlink(*batch)
+                        batch = []
+                if batch:
+                    self.client.unlink(*batch)
+            self.client.unlink("pending_requests")
             return True
         except Exception as e:
-            print(f"[-] Error clearing requests: {e}")
+            logger.error("Error clearing requests: %s", e)
             return False
 
     # -------------------------------------------------------------------------
@@ -425,9 +870,10 @@ class RedisStorage:
             if mode not in ['intercept', 'filter']:
                 return False
             self.client.set("proxy_config:mode", mode)
+            self._config_changed()
             return True
         except Exception as e:
-            print(f"[-] Error setting proxy mode: {e}")
+            logger.error("Error setting proxy mode: %s", e)
             return False
 
     def get_proxy_mode(self) -> str:
@@ -439,59 +885,150 @@ class RedisStorage:
         """
         try:
             mode = self.client.get("proxy_config:mode")
-            return mode if mode else "intercept"
+            return mode.decode() if mode else "intercept"
         except Exception as e:
-            print(f"[-] Error getting proxy mode: {e}")
+            logger.error("Error getting proxy mode: %s", e)
             return "intercept"
 
+    def get_filter_config(self) -> Dict[str, Any]:
+        """
+        Get proxy mode and both blocklists in a single round-trip
+        
+        The result is reused until a change is announced on _CONFIG_CHANNEL
+        (so every process, forked workers included, sees it at once) or
+        for at most _FILTER_CONFIG_TTL seconds; only _UNSUBSCRIBED_CONFIG_TTL
+        while the change listener's subscription is not confirmed.
+        
+        Returns:
+            Dictionary with 'mode', 'blocked_domains' (frozenset) and
+            'blocked_keywords' (sorted tuple); defaults on error
+        """
+        cached = self._filter_config_cache
+        now = time.monotonic()
+        if cached is not None and now < cached[0] and cached[1] == self._config_generation:
+            return cached[2]
+        
+        self._ensure_config_listener()
+        # Both read before the fetch: a change announced while it is in
+        # flight leaves the stored snapshot with a stale generation, and
+        # the long TTL is only trusted once a notification could arrive
+        generation = self._config_generation
+        ttl = _FILTER_CONFIG_TTL if self._config_subscribed.is_set() else _UNSUBSCRIBED_CONFIG_TTL
+        try:
+            pipe = self._pipeline(transaction=False)
+            pipe.get("proxy_config:mode")
+            pipe.smembers("proxy_config:blocked_domains")
+            pipe.smembers("proxy_config:blocked_keywords")
+            mode, domains, keywords = pipe.execute()
+        except Exception as e:
+            logger.error("Error getting filter config: %s", e)
+            return {'mode': "intercept", 'blocked_domains': frozenset(), 'blocked_keywords': ()}
+        
+        # Immutable, since every handler thread shares the same snapshot
+        config = {
+            'mode': mode.decode() if mode else "intercept",
+            'blocked_domains': frozenset(_decode(domain) for domain in domains),
+            'blocked_keywords': tuple(sorted(_decode(keyword) for keyword in keywords)),
+        }
+        self._filter_config_cache = (now + ttl, generation, config)
+        return config
+
+    def _ensure_config_listener(self) -> None:
+        """Start the config change listener unless it is already running in this process"""
+        listener = self._config_listener
+        # A thread object inherited across fork() reports not alive
+        if listener is not None and listener.is_alive():
+            return
+        with self._config_listener_lock:
+            listener = self._config_listener
+            if listener is None or not listener.is_alive():
+                listener = threading.Thread(
+                    target=self._listen_for_config_changes,
+                    name='proxy-config-listener',
+                    daemon=True
+                )
+                listener.start()
+                self._config_listener = listener
+    
+    def _listen_for_config_changes(self) -> None:
+        """Invalidate the filter config snapshot whenever a change is announced"""
+        pubsub = self._pubsub_client.pubsub()
+        try:
+            pubsub.subscribe(_CONFIG_CHANNEL)
+            for message in pubsub.listen():
+                if message['type'] == 'subscribe':
+                    self._config_subscribed.set()
+                else:
+                    self._invalidate_filter_config()
+        except Exception as e:
+            # Restarted by the next snapshot refresh
+            logger.warning("Config change listener stopped: %s", e)
+        finally:
+            self._config_subscribed.clear()
+            self._invalidate_filter_config()
+            pubsub.close()
+    
+    def _invalidate_filter_config(self) -> None:
+        """Make the current snapshot, and any fetch in flight, stale"""
+        self._config_generation = next(self._config_generations)
+    
+    def _config_changed(self) -> None:
+        """Invalidate this process' snapshot and tell every other process to do the same"""
+        self._invalidate_filter_config()
+        self.client.publish(_CONFIG_CHANNEL, b"")
+
     def add_blocked_domain(self, domain: str) -> bool:
         """Add domain to blocklist"""
         try:
             self.client.sadd("proxy_config:blocked_domains", domain)
+            self._config_changed()
             return True
         except Exception as e:
-            print(f"[-] Error adding blocked domain: {e}")
+            logger.error("Error adding blocked domain: %s", e)
             return False
 
     def remove_blocked_domain(self, domain: str) -> bool:
         """Remove domain from blocklist"""
         try:
             self.client.srem("proxy_config:blocked_domains", domain)
+            self._config_changed()
             return True
         except Exception as e:
-            print(f"[-] Error removing blocked domain: {e}")
+            logger.error("Error removing blocked domain: %s", e)
             return False
 
     def get_blocked_domains(self) -> List[str]:
         """Get list of blocked domains"""
         try:
-            return list(self.client.smembers("proxy_config:blocked_domains"))
+            return [_decode(domain) for domain in self.client.smembers("proxy_config:blocked_domains")]
         except Exception as e:
-            print(f"[-] Error getting blocked domains: {e}")
+            logger.error("Error getting blocked domains: %s", e)
             return []
 
     def add_blocked_keyword(self, keyword: str) -> bool:
         """Add keyword to blocklist"""
         try:
             self.client.sadd("proxy_config:blocked_keywords", keyword)
+            self._config_changed()
             return True
         except Exception as e:
-            print(f"[-] Error adding blocked keyword: {e}")
+            logger.error("Error adding blocked keyword: %s", e)
             return False
 
     def remove_blocked_keyword(self, keyword: str) -> bool:
         """Remove keyword from blocklist"""
         try:
             self.client.srem("proxy_config:blocked_keywords", keyword)
+            self._config_changed()
             return True
         except Exception as e:
-            print(f"[-] Error removing blocked keyword: {e}")
+            logger.error("Error removing blocked keyword: %s", e)
             return False
 
     def get_blocked_keywords(self) -> List[str]:
         """Get list of blocked keywords"""
         try:
-            return list(self.client.smembers("proxy_config:blocked_keywords"))
+            return [_decode(keyword) for keyword in self.client.smembers("proxy_config:blocked_keywords")]
         except Exception as e:
-            print(f"[-] Error getting blocked keywords: {e}")
+            logger.error("Error getting blocked keywords: %s", e)
             return []
\ No newline at end of file
@@ -3,41 +3,65 @@ Request Interceptor Module
 Handles HTTP request parsing and extraction from encrypted data
 """
 
+import logging
 import re
-from typing import Dict, Tuple, Optional
+from typing import Dict, Tuple, Optional, Union
+
+
+logger = logging.getLogger(__name__)
 
 
 class RequestInterceptor:
     """Parses and extracts request information from HTTP data"""
     
+    _CONTENT_LENGTH_RE = re.compile(rb'\r\ncontent-length:[ \t]*(\d+)', re.IGNORECASE)
+    _CHUNKED_RE = re.compile(rb'\r\ntransfer-encoding:[^\r\n]*chunked', re.IGNORECASE)
+    # CONNECT request line; group 1 is the target host without its port
+    _CONNECT_RE = re.compile(r'\s*CONNECT\s+([^:\s]+)')
+    _CONNECT_PREFIX_RE = re.compile(rb'\s*CONNECT\b')
+    # One "name: value" header line, anchored at the line start so a line
+    # without a colon is rejected in a single pass rather than retried from
+    # every offset; the value is stripped by the caller
+    _HEADER_RE = re.compile(rb'^([!-9;-~]+):[ \t]*([^\r\n]*)', re.M)
+    # Chunk-size field: bare hex digits only (int() would also take a
+    # sign, 0x or underscores), optionally followed by ;extensions
+    _CHUNK_SIZE_RE = re.compile(rb'([0-9A-Fa-f]{1,16})[ \t]*(?:;[^\r\n]*)?')
+    
     @staticmethod
-    def parse_request(raw_data: str) -> Dict[str, any]:
+    def parse_request(raw_data: bytes) -> Dict[str, any]:
         """
         Parse HTTP request data into structured format
 
+        The buffer is scanned in place: only the request line and each
+        header key/value are decoded. The body is kept as raw bytes.
+
         Args:
-            raw_data: Raw HTTP request data as string
+            raw_data: Raw HTTP request data (bytes or bytearray) as received from the socket
 
         Returns:
             Dictionary containing parsed request details
         """
         try:
-            # Split headers and body
-            parts = raw_data.split('\r\n\r\n', 1)
-            header_part = parts[0]
-            body = parts[1] if len(parts) > 1 else ""
-
-            lines = header_part.split('\r\n')
-
-            if not lines:
+            if not raw_data:
                 return RequestInterceptor._empty_request()
 
+            # Locate the end of the header block once
+            header_end = raw_data.find(b'\r\n\r\n')
+            if header_end == -1:
+                header_end = len(raw_data)
+                body = b""
+            else:
+                body = bytes(raw_data[header_end + 4:])
+
             # Parse request line
-            request_line = lines[0]
+            line_end = raw_data.find(b'\r\n', 0, header_end)
+            if line_end == -1:
+                line_end = header_end
+            request_line = raw_data[:line_end].decode('latin-1')
             method, path, version = RequestInterceptor._parse_request_line(request_line)
 
             # Parse headers
-            headers = RequestInterceptor._parse_headers(lines[1:])
+            headers = RequestInterceptor._parse_headers(raw_data, line_end + 2, header_end)
 
             return {
                 'method': method,
@@ -48,7 +72,7 @@ class RequestInterceptor:
             }
 
         except Exception as e:
-            print(f"[-] Error parsing request: {e}")
+            logger.warning("Error parsing request: %s", e)
             return RequestInterceptor._empty_request()
 
 
@@ -64,7 +88,8 @@ class RequestInterceptor:
             Tuple of (method, path, version)
         """
         try:
-            parts = line.split()
+            # The target never contains spaces: stop after the second split
+            parts = line.split(None, 2)
             method = parts[0] if len(parts) > 0 else "UNKNOWN"
             path = parts[1] if len(parts) > 1 else "/"
             version = parts[2] if len(parts) > 2 else "HTTP/1.1"
@@ -73,27 +98,91 @@ class RequestInterceptor:
             return "UNKNOWN", "/", "HTTP/1.1"
     
     @staticmethod
-    def _parse_headers(header_lines: list) -> Dict[str, str]:
+    def _parse_headers(raw_data: bytes, start: int, end: int) -> Dict[str, str]:
         """
-        Parse HTTP headers from lines
+        Parse HTTP headers from the header region of a raw request
         
         Args:
-            header_lines: List of header lines
+            raw_data: Raw HTTP request data
+            start: Offset of the first header line
+            end: Offset of the end of the header block
             
         Returns:
             Dictionary of headers
         """
-        headers = {}
+        # A single regex sweep over the header block instead of a
+        # find/slice/strip round per line
+        return {
+            name.strip().decode('latin-1'): value.strip().decode('latin-1')
+            for name, value in RequestInterceptor._HEADER_RE.findall(raw_data, start, end)
+        }
+    
+    @staticmethod
+    def get_content_length(raw_data: bytes, header_end: int) -> int:
+        """
+        Read the Content-Length header from a raw header block
         
-        for line in header_lines:
-            if not line:  # Empty line signals end of headers
-                break
+        Args:
+            raw_data: Raw HTTP request data
+            header_end: Offset of the blank line ending the headers
             
-            if ':' in line:
-                key, value = line.split(':', 1)
-                headers[key.strip()] = value.strip()
+        Returns:
+            Declared body length, 0 if absent
+        """
+        match = RequestInterceptor._CONTENT_LENGTH_RE.search(raw_data, 0, header_end)
+        return int(match.group(1)) if match else 0
+    
+    @staticmethod
+    def is_chunked(raw_data: bytes, header_end: int) -> bool:
+        """
+        Check whether a raw header block declares a chunked body
         
-        return headers
+        Args:
+            raw_data: Raw HTTP request data
+            header_end: Offset of the blank line ending the headers
+            
+        Returns:
+            True if Transfer-Encoding includes chunked
+        """
+        return RequestInterceptor._CHUNKED_RE.search(raw_data, 0, header_end) is not None
+    
+    @staticmethod
+    def scan_chunked_body(raw_data: bytes, pos: int) -> Tuple[int, bool]:
+        """
+        Walk the chunk framing of a chunked body as far as it has arrived
+        
+        Args:
+            raw_data: Raw HTTP request data
+            pos: Offset of the next chunk-size line
+            
+        Returns:
+            Tuple of (offset to resume from, whether the body is complete);
+            once complete the offset is the end of the message
+            
+        Raises:
+            ValueError: If a chunk-size line is malformed
+        """
+        while True:
+            line_end = raw_data.find(b'\r\n', pos)
+            if line_end == -1:
+                return pos, False
+            match = RequestInterceptor._CHUNK_SIZE_RE.fullmatch(raw_data, pos, line_end)
+            if match is None:
+                raise ValueError("Malformed chunk size")
+            size = int(match.group(1), 16)
+            if size == 0:
+                # Last chunk, then optional trailers up to a blank line
+                if raw_data[line_end + 2:line_end + 4] == b'\r\n':
+                    return line_end + 4, True
+                trailer_end = raw_data.find(b'\r\n\r\n', line_end)
+                if trailer_end == -1:
+                    return pos, False
+                return trailer_end + 4, True
+            next_pos = line_end + 2 + size + 2
+            assert next_pos > pos
+            if next_pos > len(raw_data):
+                return pos, False
+            pos = next_pos
     
     @staticmethod
     def _empty_request() -> Dict:
@@ -103,6 +192,7 @@ class RequestInterceptor:
             'path': '/',
             'version': 'HTTP/1.1',
             'headers': {},
+            'body': b'',
             'raw': ''
         }
     
@@ -117,29 +207,20 @@ class RequestInterceptor:
         Returns:
             Hostname or None
         """
-        try:
-            if not request_line.startswith("CONNECT"):
-                return None
-            
-            parts = request_line.split()
-            if len(parts) < 2:
-                return None
-            
-            host_port = parts[1]
-            hostname = host_port.split(':')[0]
-            return hostname
-        except Exception:
-            return None
+        match = RequestInterceptor._CONNECT_RE.match(request_line)
+        return match.group(1) if match else None
     
     @staticmethod
-    def is_connect_request(request_line: str) -> bool:
+    def is_connect_request(request_line: Union[str, bytes]) -> bool:
         """
         Check if request is a CONNECT (tunnel) request
         
         Args:
-            request_line: Request line string
+            request_line: Request line, as str or as raw bytes
             
         Returns:
             True if CONNECT request, False otherwise
         """
-        return request_line.strip().startswith("CONNECT")
\ No newline at end of file
+        if isinstance(request_line, (bytes, bytearray)):
+            return RequestInterceptor._CONNECT_PREFIX_RE.match(request_line) is not None
+        return RequestInterceptor._CONNECT_RE.match(request_line) is not None
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+Tests for the ProxyAPI batch endpoint
+"""
+
+import unittest
+
+from flask import jsonify, request
+
+from proxy_api import ProxyAPI
+
+
+class _StubStorage:
+    """Storage double answering the lookups the batch calls below make"""
+    
+    def get_response(self, request_id):
+        return None
+
+
+class BatchTest(unittest.TestCase):
+    """In-process dispatch of several GET calls"""
+    
+    def setUp(self):
+        api = ProxyAPI(_StubStorage())
+        
+        @api.app.route('/api/test/echo', methods=['GET'])
+        def echo():
+            return jsonify(dict(request.args)), 200
+        
+        self.client = api.app.test_client()
+    
+    def test_sub_call_sees_its_own_query_string(self):
+        response = self.client.post('/api/batch?outer=1', json=[
+            {'path': '/api/test/echo?a=1&b=two'},
+            {'path': '/api/test/echo'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), [
+            {'status': 200, 'body': {'a': '1', 'b': 'two'}},
+            {'status': 200, 'body': {}},
+        ])
+    
+    def test_call_errors_stay_in_their_entry(self):
+        response = self.client.post('/api/batch', json=[
+            {'path': '/api/nope'},
+            {'path': '/api/test/echo', 'method': 'POST'},
+            'x',
+            {'path': '/api/responses/r1'},
+        ])
+        self.assertEqual([entry['status'] for entry in response.get_json()], [404, 405, 400, 404])
+    
+    def test_batch_size_is_capped(self):
+        response = self.client.post('/api/batch', json=[{'path': '/api/test/echo'}] * 51)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
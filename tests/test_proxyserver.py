@@ -0,0 +1,86 @@
+"""
+Tests for MITMProxyServer request reading
+"""
+
+import socket
+import threading
+import unittest
+from unittest import mock
+
+from config import REQUEST_MAX_HEADER_SIZE
+from proxyserver import MITMProxyServer
+
+
+class RecvRequestTest(unittest.TestCase):
+    """_recv_request over a socket pair, without CA or Redis setup"""
+    
+    def setUp(self):
+        # Only the per-thread receive buffer is needed to read requests
+        self.proxy = MITMProxyServer.__new__(MITMProxyServer)
+        self.proxy._thread_local = threading.local()
+        self.server, self.client = socket.socketpair()
+        self.server.settimeout(5)
+        self.client.settimeout(5)
+        self.addCleanup(self.server.close)
+        self.addCleanup(self.client.close)
+    
+    def _recv(self, *parts, close=True):
+        """Send parts from a thread and return (request read, reply sent)"""
+        def send():
+            for part in parts:
+                self.client.sendall(part)
+            if close:
+                self.client.shutdown(socket.SHUT_WR)
+        
+        sender = threading.Thread(target=send)
+        sender.start()
+        request = self.proxy._recv_request(self.server)
+        sender.join()
+        self.server.shutdown(socket.SHUT_WR)
+        reply = b"".join(iter(lambda: self.client.recv(65536), b""))
+        return bytes(request), reply
+    
+    def test_content_length_body(self):
+        message = b"POST / HTTP/1.1\r\nHost: h\r\nContent-Length: 5\r\n\r\nhello"
+        self.assertEqual(self._recv(message[:10], message[10:40], message[40:], close=False), (message, b""))
+    
+    def test_peer_closing_early_returns_what_arrived(self):
+        message = b"POST / HTTP/1.1\r\nContent-Length: 10\r\n\r\nabc"
+        self.assertEqual(self._recv(message), (message, b""))
+    
+    def test_chunked_body(self):
+        message = b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n0\r\n\r\n"
+        # Bytes past the last chunk are not part of the request
+        self.assertEqual(self._recv(message[:50], message[50:] + b"GET", close=False), (message, b""))
+    
+    def test_malformed_chunk_size_is_refused(self):
+        request, reply = self._recv(b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n-6\r\nxx\r\n")
+        self.assertEqual(request, b"")
+        self.assertTrue(reply.startswith(b"HTTP/1.1 400 "))
+    
+    def test_oversized_content_length_is_refused(self):
+        request, reply = self._recv(b"POST / HTTP/1.1\r\nContent-Length: 99999999999\r\n\r\n", close=False)
+        self.assertEqual(request, b"")
+        self.assertTrue(reply.startswith(b"HTTP/1.1 413 "))
+    
+    def test_oversized_chunked_body_is_refused(self):
+        with mock.patch('proxyserver.REQUEST_MAX_BODY_SIZE', 1024):
+            request, reply = self._recv(
+                b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n800\r\n" + b"x" * 2048,
+                close=False
+            )
+        self.assertEqual(request, b"")
+        self.assertTrue(reply.startswith(b"HTTP/1.1 413 "))
+    
+    def test_oversized_headers_are_refused(self):
+        request, reply = self._recv(
+            b"GET / HTTP/1.1\r\n",
+            b"X-Long: " + b"x" * REQUEST_MAX_HEADER_SIZE,
+            close=False
+        )
+        self.assertEqual(request, b"")
+        self.assertTrue(reply.startswith(b"HTTP/1.1 431 "))
+
+
+if __name__ == "__main__":
+    unittest.main()
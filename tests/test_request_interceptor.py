@@ -0,0 +1,67 @@
+"""
+Tests for RequestInterceptor header parsing and chunked body framing
+"""
+
+import time
+import unittest
+
+from config import REQUEST_MAX_HEADER_SIZE
+from request_interceptor import RequestInterceptor
+
+
+class ParseHeadersTest(unittest.TestCase):
+    """Header block parsing on raw request bytes"""
+    
+    def test_headers_and_body(self):
+        parsed = RequestInterceptor.parse_request(
+            b"GET /a?b HTTP/1.1\r\nHost:  x.com \r\nnocolon\r\nX-Y: a:b\r\nEmpty:\r\n\r\nbody"
+        )
+        self.assertEqual(parsed['method'], 'GET')
+        self.assertEqual(parsed['path'], '/a?b')
+        self.assertEqual(parsed['headers'], {'Host': 'x.com', 'X-Y': 'a:b', 'Empty': ''})
+        self.assertEqual(parsed['body'], b"body")
+    
+    def test_long_colonless_line_is_linear(self):
+        # A maximum-size header line without a colon must not backtrack
+        # from every offset (this took tens of seconds with an unanchored
+        # pattern)
+        for line in (b"x" * REQUEST_MAX_HEADER_SIZE, b"a: x" + b" " * REQUEST_MAX_HEADER_SIZE + b"y"):
+            start = time.perf_counter()
+            parsed = RequestInterceptor.parse_request(b"GET / HTTP/1.1\r\n" + line + b"\r\nHost: h\r\n\r\n")
+            self.assertLess(time.perf_counter() - start, 0.5)
+            self.assertEqual(parsed['headers']['Host'], 'h')
+
+
+
+class ScanChunkedBodyTest(unittest.TestCase):
+    """Chunk framing walk over a partially received body"""
+    
+    def test_complete_body(self):
+        data = b"4;ext=1\r\nWiki\r\n5 \r\npedia\r\n0\r\n\r\n"
+        self.assertEqual(RequestInterceptor.scan_chunked_body(data, 0), (len(data), True))
+    
+    def test_trailers(self):
+        data = b"1\r\nx\r\n0\r\nX-T: 1\r\n\r\n"
+        self.assertEqual(RequestInterceptor.scan_chunked_body(data, 0), (len(data), True))
+    
+    def test_size_split_across_reads(self):
+        data = b"1A\r\n" + b"x" * 0x1A + b"\r\n0\r\n\r\n"
+        pos, complete = RequestInterceptor.scan_chunked_body(data[:1], 0)
+        self.assertEqual((pos, complete), (0, False))
+        pos, complete = RequestInterceptor.scan_chunked_body(data[:10], pos)
+        self.assertEqual((pos, complete), (0, False))
+        pos, complete = RequestInterceptor.scan_chunked_body(data[:-3], pos)
+        self.assertEqual((pos, complete), (4 + 0x1A + 2, False))
+        self.assertEqual(RequestInterceptor.scan_chunked_body(data, pos), (len(data), True))
+    
+    def test_malformed_sizes_are_rejected(self):
+        # int(..., 16) accepts all of these; a negative size used to move
+        # the scan position backwards and loop forever
+        for size in (b"-6", b"+6", b"0x6", b"6_0", b"1" * 17, b"", b"g", b" 6"):
+            with self.subTest(size=size):
+                with self.assertRaises(ValueError):
+                    RequestInterceptor.scan_chunked_body(size + b"\r\nxxxxxx\r\n0\r\n\r\n", 0)
+
+
+if __name__ == "__main__":
+    unittest.main()